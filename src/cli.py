@@ -1,6 +1,6 @@
 """Handles CLI commands parsing.
 """
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
 from typing import Any
 
 
@@ -10,7 +10,141 @@ def create_parser() -> ArgumentParser:
     Returns:
         ArgumentParser: [description]
     """
-    return ArgumentParser(description="Elections 2021 API shell handler.")
+    parser: ArgumentParser = ArgumentParser(
+        description="Elections 2021 API shell handler."
+    )
+    parser.add_argument(
+        "--engine",
+        action="store",
+        type=str,
+        choices=["sync", "async"],
+        default="sync",
+        help="Pipeline engine. `sync` runs fetch, parse and output one after another,\
+        `async` runs them concurrently.",
+    )
+    parser.add_argument(
+        "--record",
+        action="store",
+        type=str,
+        required=False,
+        help="Append every fetched payload to given .jsonl recording, which can be replayed later.\
+        Used by `county`, `state`, `city`, `prefetch` and `shard` commands.",
+    )
+    parser.add_argument(
+        "--shared",
+        action="store_true",
+        help="Read data polled by `shard` workers from the coordinator,\
+        fetch only data missing there.",
+    )
+    # without subcommand, state data are output
+    parser.set_defaults(command="state", fields=None, elements=None)
+    return parser
+
+
+def comma_separated(value: str) -> list[str]:
+    """Splits comma separated CLI arg value into `list`.
+
+    Args:
+        value (str): CLI arg value, e.g. "NAZEVZAST,HLASY"
+
+    Returns:
+        list[str]: parsed values, e.g. `["NAZEVZAST", "HLASY"]`
+    """
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def positive_float(value: str) -> float:
+    """Converts CLI arg value into `float`, which must be greater than zero.
+
+    Args:
+        value (str): CLI arg value
+
+    Raises:
+        ArgumentTypeError: if the value is not a number greater than zero
+
+    Returns:
+        float: parsed value
+    """
+    try:
+        number: float = float(value)
+    except ValueError as exc:
+        raise ArgumentTypeError(f"{value} is not a number.") from exc
+
+    if number <= 0:
+        raise ArgumentTypeError(f"{value} must be greater than 0.")
+    return number
+
+
+def non_negative_float(value: str) -> float:
+    """Converts CLI arg value into `float`, which must not be negative.
+
+    Args:
+        value (str): CLI arg value
+
+    Raises:
+        ArgumentTypeError: if the value is not a non-negative number
+
+    Returns:
+        float: parsed value
+    """
+    try:
+        number: float = float(value)
+    except ValueError as exc:
+        raise ArgumentTypeError(f"{value} is not a number.") from exc
+
+    if number < 0:
+        raise ArgumentTypeError(f"{value} must not be negative.")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """Converts CLI arg value into `int`, which must be greater than zero.
+
+    Args:
+        value (str): CLI arg value
+
+    Raises:
+        ArgumentTypeError: if the value is not an integer greater than zero
+
+    Returns:
+        int: parsed value
+    """
+    try:
+        number: int = int(value)
+    except ValueError as exc:
+        raise ArgumentTypeError(f"{value} is not an integer.") from exc
+
+    if number <= 0:
+        raise ArgumentTypeError(f"{value} must be greater than 0.")
+    return number
+
+
+def add_projection_arguments(parser: ArgumentParser) -> ArgumentParser:
+    """Adds `--fields` and `--elements` args, limiting the parsed data, to the parser.
+
+    Args:
+        parser (ArgumentParser): (sub)parser instance
+
+    Returns:
+        ArgumentParser: instance
+    """
+    parser.add_argument(
+        "--fields",
+        action="store",
+        type=comma_separated,
+        required=False,
+        help="Comma separated XML attributes to be parsed and output, e.g. `NAZEVZAST,HLASY`.\
+        All attributes, if not provided.",
+    )
+    parser.add_argument(
+        "--elements",
+        action="store",
+        type=comma_separated,
+        required=False,
+        help="Comma separated XML elements to be parsed and output, e.g. `VOLEBNI_STRANA`.\
+        All elements, if not provided.",
+    )
+    return parser
 
 
 def create_subparsers(parser: ArgumentParser) -> ArgumentParser:
@@ -27,11 +161,13 @@ def create_subparsers(parser: ArgumentParser) -> ArgumentParser:
     parser_county: ArgumentParser = subparsers.add_parser(
         "county", help="parser for county/city level data."
     )
+    parser_county.set_defaults(command="county")
     parser_county.add_argument(
         "nuts",
         action="store",
         type=str,
-        help="NUTS classifier code value.",
+        nargs="+",
+        help="NUTS classifier code value(s).",
     )
     parser_county.add_argument(
         "--name",
@@ -41,10 +177,18 @@ def create_subparsers(parser: ArgumentParser) -> ArgumentParser:
         help="County/City name, if you want to output not whole NUTS, \
         but only concrete city/county.",
     )
+    parser_county.add_argument(
+        "--prefetch-neighbours",
+        action="store_true",
+        help="Prefetch data of the other counties from the same region in the background.",
+    )
+
+    add_projection_arguments(parser_county)
 
     parser_state: ArgumentParser = subparsers.add_parser(
         "state", help="parser for state level data."
     )
+    parser_state.set_defaults(command="state")
     parser_state.add_argument(
         "--district",
         action="store",
@@ -54,6 +198,108 @@ def create_subparsers(parser: ArgumentParser) -> ArgumentParser:
             Range is 1 - 14 inclusive.",
     )
 
+    add_projection_arguments(parser_state)
+
+    parser_city: ArgumentParser = subparsers.add_parser(
+        "city", help="parser for city level data, looked up by the city name."
+    )
+    parser_city.set_defaults(command="city")
+    parser_city.add_argument(
+        "name",
+        action="store",
+        type=str,
+        help="City name, case and diacritics insensitive.",
+    )
+    parser_city.add_argument(
+        "--prefix",
+        action="store_true",
+        help="List all cities with names starting with `name`.",
+    )
+    parser_city.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help="Rebuild the city index from county data before the lookup.",
+    )
+    parser_city.add_argument(
+        "--nuts",
+        action="store",
+        type=str,
+        required=False,
+        help="NUTS code or prefix of the county, to pick one of the cities with the same name.",
+    )
+
+    add_projection_arguments(parser_city)
+
+    parser_prefetch: ArgumentParser = subparsers.add_parser(
+        "prefetch", help="fills the cache for county and state data."
+    )
+    parser_prefetch.set_defaults(command="prefetch")
+    parser_prefetch.add_argument(
+        "nuts",
+        action="store",
+        type=str,
+        nargs="*",
+        help="NUTS code(s) or prefixes, e.g. region `CZ064`. All counties, if not provided.",
+    )
+    parser_prefetch.add_argument(
+        "--rate",
+        action="store",
+        type=positive_float,
+        default=5.0,
+        help="Max number of requests started per second.",
+    )
+    parser_prefetch.add_argument(
+        "--concurrency",
+        action="store",
+        type=positive_int,
+        required=False,
+        help="Max number of requests in progress. Defaults to `fetch_concurrency` from config.",
+    )
+
+    parser_shard: ArgumentParser = subparsers.add_parser(
+        "shard",
+        help="polls a share of county and state data as one of several workers.",
+    )
+    parser_shard.set_defaults(command="shard")
+    parser_shard.add_argument(
+        "nuts",
+        action="store",
+        type=str,
+        nargs="*",
+        help="NUTS code(s) or prefixes to be polled by all workers. All counties, if not provided.",
+    )
+    parser_shard.add_argument(
+        "--worker-id",
+        action="store",
+        type=str,
+        required=False,
+        help="Unique worker identifier. Defaults to `<hostname>-<pid>`.",
+    )
+
+    parser_replay: ArgumentParser = subparsers.add_parser(
+        "replay", help="replays recorded payloads thru the parsers and output."
+    )
+    parser_replay.set_defaults(command="replay")
+    parser_replay.add_argument(
+        "recording",
+        action="store",
+        type=str,
+        help="Filepath of the .jsonl recording, see `--record`.",
+    )
+    parser_replay.add_argument(
+        "--speed",
+        action="store",
+        type=non_negative_float,
+        default=0.0,
+        help="Time compression of the recording, e.g. 60 replays one hour in one minute.\
+        0 replays as fast as possible.",
+    )
+    parser_replay.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Do not output the parsed data, only the replay statistics.",
+    )
+
     return parser
 
 
@@ -0,0 +1,208 @@
+"""Handles validation of the configuration and resolving of the per-resource settings.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from src.io import load_config
+
+CACHE_BACKENDS: tuple[str, ...] = ("disk", "memory", "none")
+
+DEFAULTS: dict[str, dict[str, Any]] = {
+    "polling": {"interval": 600},
+    "limits": {
+        "fetch_concurrency": 4,
+        "parse_concurrency": 2,
+        "queue_size": 8,
+        "max_memory_cache_bytes": 64 * 1024 * 1024,
+        "max_disk_cache_entries": 0,
+        "stream_threshold_bytes": 8 * 1024 * 1024,
+    },
+    "shard": {
+        "coordinator": "shard.sqlite",
+        "worker_ttl": 1800,
+        "lease_duration": 300,
+        "result_ttl": 600,
+        "replicas": 64,
+    },
+    "index": {"location": "city_index.json"},
+    "cache": {
+        "ttl": 600,
+        "backend": "disk",
+        "location": "cache.tmp",
+        "compression_level": 6,
+    },
+}
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+RULES: dict[str, dict[str, tuple[Callable[[Any], bool], str]]] = {
+    "polling": {
+        "interval": (lambda v: _is_int(v) and v >= 0, "non-negative integer"),
+    },
+    "limits": {
+        "fetch_concurrency": (lambda v: _is_int(v) and v >= 1, "positive integer"),
+        "parse_concurrency": (lambda v: _is_int(v) and v >= 1, "positive integer"),
+        "queue_size": (lambda v: _is_int(v) and v >= 1, "positive integer"),
+        "max_memory_cache_bytes": (
+            lambda v: _is_int(v) and v >= 0,
+            "non-negative integer",
+        ),
+        "max_disk_cache_entries": (
+            lambda v: _is_int(v) and v >= 0,
+            "non-negative integer",
+        ),
+        "stream_threshold_bytes": (
+            lambda v: _is_int(v) and v >= 0,
+            "non-negative integer",
+        ),
+    },
+    "shard": {
+        "coordinator": (
+            lambda v: isinstance(v, str) and v != "",
+            "non-empty string",
+        ),
+        "worker_ttl": (lambda v: _is_int(v) and v >= 1, "positive integer"),
+        "lease_duration": (lambda v: _is_int(v) and v >= 1, "positive integer"),
+        "result_ttl": (lambda v: _is_int(v) and v >= 0, "non-negative integer"),
+        "replicas": (lambda v: _is_int(v) and v >= 1, "positive integer"),
+    },
+    "index": {
+        "location": (lambda v: isinstance(v, str) and v != "", "non-empty string"),
+    },
+    "cache": {
+        "ttl": (lambda v: _is_int(v) and v >= 0, "non-negative integer"),
+        "backend": (lambda v: v in CACHE_BACKENDS, f"one of {CACHE_BACKENDS}"),
+        "location": (lambda v: isinstance(v, str) and v != "", "non-empty string"),
+        "compression_level": (
+            lambda v: _is_int(v) and 0 <= v <= 9,
+            "integer 0 - 9",
+        ),
+    },
+}
+
+
+def _validate_section(
+    name: str, section: dict[str, Any], rules: dict[str, tuple[Callable, str]]
+) -> list[str]:
+    errors: list[str] = []
+
+    for key, value in section.items():
+        if key not in rules:
+            errors.append(f"[{name}] unknown key `{key}`")
+            continue
+
+        check, description = rules[key]
+        if not check(value):
+            errors.append(f"[{name}] `{key}` must be {description}, got {value!r}")
+
+    return errors
+
+
+def validate_config(config: dict[str, Any]) -> dict[str, Any]:
+    """Validates the configuration and returns it with defaults filled in.
+
+    Per-resource cache settings in `[cache.resources.<resource name>]` may override
+    any of the `[cache]` keys. Resource name must be one of `[api.resources]` keys.
+
+    Args:
+        config (dict[str, Any]): parsed .toml configuration file content
+
+    Raises:
+        ValueError: if the configuration is invalid, message lists all found problems
+
+    Returns:
+        dict[str, Any]: validated configuration with defaults filled in
+    """
+    errors: list[str] = []
+    validated: dict[str, Any] = dict(config)
+    api_resources: dict[str, str] = config.get("api", {}).get("resources", {})
+
+    if not api_resources:
+        errors.append("[api.resources] at least one resource must be defined")
+
+    for name, defaults in DEFAULTS.items():
+        section: dict[str, Any] = dict(config.get(name, {}))
+        overrides: dict[str, Any] = (
+            section.pop("resources", {}) if name == "cache" else {}
+        )
+
+        errors.extend(_validate_section(name, section, RULES[name]))
+        validated[name] = {**defaults, **section}
+
+        if name != "cache":
+            continue
+
+        for resource_name, resource_section in overrides.items():
+            if resource_name not in api_resources:
+                errors.append(
+                    f"[cache.resources.{resource_name}] is not in [api.resources]"
+                )
+            errors.extend(
+                _validate_section(
+                    f"cache.resources.{resource_name}", resource_section, RULES[name]
+                )
+            )
+        validated[name]["resources"] = overrides
+
+    if errors:
+        raise ValueError("Invalid configuration:\n- " + "\n- ".join(errors))
+
+    return validated
+
+
+@lru_cache(maxsize=None)
+def get_settings(filepath: str = "config.toml") -> dict[str, Any]:
+    """Loads and validates the configuration file. Result is cached.
+
+    Args:
+        filepath (str, optional): filepath to configuration file. Defaults to "config.toml".
+
+    Returns:
+        dict[str, Any]: validated configuration
+    """
+    return validate_config(load_config(filepath))
+
+
+def cache_policy(
+    resource_name: Optional[str], settings: Optional[dict[str, Any]] = None
+) -> dict[str, Any]:
+    """Returns cache settings of the given resource.
+
+    Args:
+        resource_name (Optional[str]): name of the resource as in `[api.resources]`.
+        If None, `[cache]` defaults are returned.
+        settings (Optional[dict[str, Any]], optional): validated configuration.
+        Defaults to `get_settings()`.
+
+    Returns:
+        dict[str, Any]: `[cache]` settings merged with the resource overrides
+    """
+    cache_settings: dict[str, Any] = dict((settings or get_settings())["cache"])
+    overrides: dict[str, Any] = cache_settings.pop("resources")
+    return {**cache_settings, **overrides.get(resource_name, {})}
+
+
+def poll_interval(
+    resource_name: Optional[str], settings: Optional[dict[str, Any]] = None
+) -> int:
+    """Returns seconds between two polls of the given resource.
+
+    Resource is polled again, when its cache expires, but at least every
+    `[polling] interval` seconds.
+
+    Args:
+        resource_name (Optional[str]): name of the resource as in `[api.resources]`.
+        If None, `[polling] interval` is returned.
+        settings (Optional[dict[str, Any]], optional): validated configuration.
+        Defaults to `get_settings()`.
+
+    Returns:
+        int: poll interval in seconds
+    """
+    settings_: dict[str, Any] = settings or get_settings()
+    interval: int = settings_["polling"]["interval"]
+    ttl: int = cache_policy(resource_name, settings_)["ttl"]
+    return min(interval, ttl) if resource_name is not None and ttl > 0 else interval
@@ -3,29 +3,57 @@
 
 from typing import Any, Callable, Optional, Union
 
-from src.io import process_cache, read_psrkl
+from src.config import cache_policy, get_settings
+from src.io import process_cache, process_memory_cache, read_psrkl
 
 
 def cache(**kwargs):
     """Caches the api call.
 
+    Cache policy is taken from the configuration file, see `src.config.cache_policy`.
+    It is resolved at call time, so the decorated funcs can be imported before
+    the configuration is validated.
+
     Args:
-        time_delta: (int, Optional) how long to cache and thus return cached data. Defaults to `60`.
-        location: (str, Optional) location of the cache file. Defaults to `cache.tmp`
+        resource_name: (str, Optional) name of the resource in `[api.resources]` config
+        section, which cache policy applies. Defaults to `None`, i.e. `[cache]` defaults.
         resource_template: (str, Optional) string template to be replaced from the resource URL
         by the actual value. Defaults to `{{nuts}}`
+        ttl, backend, location, compression_level: (Optional) override the configured policy.
     """
+    resource_name: Optional[str] = kwargs.pop("resource_name", None)
+    resource_template: Optional[str] = kwargs.pop("resource_template", r"{{nuts}}")
+    overrides: dict[str, Any] = kwargs
 
-    def inner(
-        func,
-        time_delta: int = kwargs["time_delta"],
-        location: str = kwargs["location"],
-        resource_template: Optional[str] = kwargs["resource_template"],
-    ):
+    def inner(func):
         def wrapper(*args, **kwargs):
-            return process_cache(
-                time_delta, location, func, resource_template, *args, **kwargs
-            )
+            policy: dict[str, Any] = {**cache_policy(resource_name), **overrides}
+            limits: dict[str, Any] = get_settings()["limits"]
+
+            if policy["backend"] == "memory":
+                return process_memory_cache(
+                    policy["ttl"],
+                    func,
+                    resource_template,
+                    *args,
+                    max_bytes=limits["max_memory_cache_bytes"],
+                    compression_level=policy["compression_level"],
+                    **kwargs,
+                )
+
+            if policy["backend"] == "disk":
+                return process_cache(
+                    policy["ttl"],
+                    policy["location"],
+                    func,
+                    resource_template,
+                    *args,
+                    compression_level=policy["compression_level"],
+                    max_entries=limits["max_disk_cache_entries"],
+                    **kwargs,
+                )
+
+            return func(*args, **kwargs)
 
         return wrapper
 
@@ -0,0 +1,300 @@
+# pylint: disable=broad-except
+
+"""Engines running the fetch -> parse -> output pipeline.
+
+Synchronous engine processes jobs one after another. Asynchronous engine
+runs the stages concurrently, connected by bounded queues.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+_DONE = object()
+
+
+def fetch(api_func: Callable, **kwargs) -> str:
+    """Calls the api func and returns raw data.
+
+    Args:
+        api_func (Callable): api func returning `(status, data)` tuple
+
+    Raises:
+        RuntimeError: if the api func returns error message
+
+    Returns:
+        str: raw data
+    """
+    status, raw_data = api_func(**kwargs)
+
+    if not status:
+        raise RuntimeError(f"{raw_data}")
+
+    return raw_data
+
+
+def exceeds_threshold(raw_data: str, threshold: int) -> bool:
+    """Returns whether UTF-8 encoded raw data are larger than `threshold` bytes.
+
+    Payload is encoded only if its size can not be decided from the number
+    of characters, i.e. one character takes 1 - 4 bytes.
+
+    Args:
+        raw_data (str): raw data as returned by `fetch`
+        threshold (int): size in bytes, `0` means no threshold
+
+    Returns:
+        bool: True if raw data are larger than `threshold`
+    """
+    if threshold <= 0 or len(raw_data) * 4 <= threshold:
+        return False
+    if len(raw_data) > threshold:
+        return True
+    return len(raw_data.encode("utf-8")) > threshold
+
+
+def parse(
+    general_parser: Callable,
+    data_specific_parser: Callable,
+    raw_data: str,
+    stream_parser: Optional[Callable] = None,
+    stream_threshold: int = 0,
+    **kwargs,
+) -> Any:
+    """Parses raw data using general parser, then data specific parser.
+
+    If `stream_parser` is provided and raw data are larger than `stream_threshold`
+    bytes, raw data are parsed by `stream_parser` instead.
+
+    Args:
+        general_parser (Callable): parser of the raw data, returning `(status, parsed)`
+        data_specific_parser (Callable): parser of the `general_parser` output
+        raw_data (str): raw data as returned by `fetch`
+        stream_parser (Optional[Callable], optional): parser of the raw data
+        for large payloads. Defaults to None.
+        stream_threshold (int, optional): size of UTF-8 encoded raw data in bytes,
+        above which `stream_parser` is used. `0` disables streaming. Defaults to 0.
+
+    Raises:
+        RuntimeError: if `general_parser` fails
+
+    Returns:
+        Any: processed data
+    """
+    if stream_parser is not None and exceeds_threshold(raw_data, stream_threshold):
+        return stream_parser(raw_data, **kwargs)
+
+    status, parsed_data = general_parser(raw_data)
+
+    if not status:
+        raise RuntimeError(f"{parsed_data}")
+
+    return data_specific_parser(parsed_data, **kwargs)
+
+
+def run_sync(
+    api_func: Callable,
+    general_parser: Callable,
+    data_specific_parser: Callable,
+    printer: Callable,
+    jobs: list[dict[str, Any]],
+    stream_parser: Optional[Callable] = None,
+    stream_threshold: int = 0,
+    on_error: Optional[Callable] = None,
+) -> None:
+    """Runs the pipeline for each job sequentially. Each stage blocks the next one.
+
+    Args:
+        api_func (Callable): api func
+        general_parser (Callable): general parser
+        data_specific_parser (Callable): data specific parser
+        printer (Callable): output func
+        jobs (list[dict[str, Any]]): kwargs passed to the stages, one `dict` per job
+        stream_parser (Optional[Callable], optional): see `parse`. Defaults to None.
+        stream_threshold (int, optional): see `parse`. Defaults to 0.
+        on_error (Optional[Callable], optional): called with the job and the exception,
+        if fetch or parse of the job fails. The job is skipped then. If None,
+        the exception is raised. Defaults to None.
+    """
+    for job in jobs:
+        try:
+            processed: Any = parse(
+                general_parser,
+                data_specific_parser,
+                fetch(api_func, **job),
+                stream_parser,
+                stream_threshold,
+                **job,
+            )
+        except Exception as exc:
+            if on_error is None:
+                raise
+            on_error(job, exc)
+            continue
+
+        printer(processed)
+
+
+async def _fetch_stage(
+    api_func: Callable,
+    jobs: asyncio.Queue,
+    fetched: asyncio.Queue,
+    on_error: Optional[Callable],
+) -> None:
+    while (job := await jobs.get()) is not _DONE:
+        try:
+            raw_data: str = await asyncio.to_thread(fetch, api_func, **job)
+        except Exception as exc:
+            if on_error is None:
+                raise
+            on_error(job, exc)
+            continue
+        await fetched.put((job, raw_data))
+
+
+async def _parse_stage(
+    general_parser: Callable,
+    data_specific_parser: Callable,
+    fetched: asyncio.Queue,
+    parsed: asyncio.Queue,
+    executor: Executor,
+    stream_kwargs: dict[str, Any],
+    on_error: Optional[Callable],
+) -> None:
+    loop = asyncio.get_running_loop()
+
+    while (item := await fetched.get()) is not _DONE:
+        job, raw_data = item
+        try:
+            processed: Any = await loop.run_in_executor(
+                executor,
+                partial(
+                    parse,
+                    general_parser,
+                    data_specific_parser,
+                    raw_data,
+                    **stream_kwargs,
+                    **job,
+                ),
+            )
+        except Exception as exc:
+            if on_error is None:
+                raise
+            on_error(job, exc)
+            continue
+        await parsed.put(processed)
+
+
+async def _output_stage(printer: Callable, parsed: asyncio.Queue) -> None:
+    while (processed := await parsed.get()) is not _DONE:
+        printer(processed)
+
+
+async def run_pipeline(
+    api_func: Callable,
+    general_parser: Callable,
+    data_specific_parser: Callable,
+    printer: Callable,
+    jobs: list[dict[str, Any]],
+    fetch_concurrency: int = 4,
+    parse_concurrency: int = 2,
+    queue_size: int = 8,
+    executor: Optional[Executor] = None,
+    stream_parser: Optional[Callable] = None,
+    stream_threshold: int = 0,
+    on_error: Optional[Callable] = None,
+) -> None:
+    """Runs the pipeline stages concurrently.
+
+    Fetches run in threads, so the cached api funcs can be reused as they are.
+    Parsing runs in the `executor`. Stages are connected by queues bounded
+    by `queue_size`, so fetches keep flowing while earlier payloads are
+    parsed or printed, but do not pile up unbounded.
+
+    Output order follows the order in which the jobs finished, not the order of `jobs`.
+
+    Args:
+        api_func (Callable): api func
+        general_parser (Callable): general parser
+        data_specific_parser (Callable): data specific parser
+        printer (Callable): output func
+        jobs (list[dict[str, Any]]): kwargs passed to the stages, one `dict` per job
+        fetch_concurrency (int, optional): number of concurrent fetches. Defaults to 4.
+        parse_concurrency (int, optional): number of concurrent parses. Defaults to 2.
+        queue_size (int, optional): capacity of queues between stages. Defaults to 8.
+        executor (Optional[Executor], optional): executor running the parsing.
+        Defaults to `ThreadPoolExecutor` with `parse_concurrency` workers.
+        stream_parser (Optional[Callable], optional): see `parse`. Defaults to None.
+        stream_threshold (int, optional): see `parse`. Defaults to 0.
+        on_error (Optional[Callable], optional): see `run_sync`. Defaults to None.
+    """
+    stream_kwargs: dict[str, Any] = {
+        "stream_parser": stream_parser,
+        "stream_threshold": stream_threshold,
+    }
+    job_queue: asyncio.Queue = asyncio.Queue()
+    fetched: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    parsed: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    for job in jobs:
+        job_queue.put_nowait(job)
+    for _ in range(fetch_concurrency):
+        job_queue.put_nowait(_DONE)
+
+    async def fetchers() -> None:
+        await asyncio.gather(
+            *[
+                _fetch_stage(api_func, job_queue, fetched, on_error)
+                for _ in range(fetch_concurrency)
+            ]
+        )
+        for _ in range(parse_concurrency):
+            await fetched.put(_DONE)
+
+    async def parsers(executor_: Executor) -> None:
+        await asyncio.gather(
+            *[
+                _parse_stage(
+                    general_parser,
+                    data_specific_parser,
+                    fetched,
+                    parsed,
+                    executor_,
+                    stream_kwargs,
+                    on_error,
+                )
+                for _ in range(parse_concurrency)
+            ]
+        )
+        await parsed.put(_DONE)
+
+    if executor is not None:
+        await asyncio.gather(
+            fetchers(), parsers(executor), _output_stage(printer, parsed)
+        )
+        return
+
+    with ThreadPoolExecutor(max_workers=parse_concurrency) as own_executor:
+        await asyncio.gather(
+            fetchers(), parsers(own_executor), _output_stage(printer, parsed)
+        )
+
+
+def run_async(
+    api_func: Callable,
+    general_parser: Callable,
+    data_specific_parser: Callable,
+    printer: Callable,
+    jobs: list[dict[str, Any]],
+    **kwargs,
+) -> None:
+    """Runs `run_pipeline` in new event loop. Signature mirrors `run_sync`.
+
+    Keyword args are passed to `run_pipeline`.
+    """
+    asyncio.run(
+        run_pipeline(
+            api_func, general_parser, data_specific_parser, printer, jobs, **kwargs
+        )
+    )
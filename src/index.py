@@ -0,0 +1,125 @@
+"""Handles index of municipality names, which maps names to county NUTS and `KODZASTUP` codes.
+"""
+import json
+from bisect import bisect_left
+from itertools import islice
+from os.path import isfile
+from typing import Any, Optional
+from unicodedata import category, normalize
+
+
+def normalize_name(name: str) -> str:
+    """Returns case and diacritics insensitive form of the municipality name.
+
+    Args:
+        name (str): municipality name, e.g. "Brno-Žabovřesky"
+
+    Returns:
+        str: normalized name, e.g. "brno-zabovresky"
+    """
+    decomposed: str = normalize("NFKD", name)
+    stripped: str = "".join(char for char in decomposed if category(char) != "Mn")
+    return " ".join(stripped.casefold().split())
+
+
+def index_county_data(parsed_data: Any, nuts: str, **kwargs) -> list[dict[str, str]]:
+    """Returns index entries of all municipalities in the parsed county XML data.
+
+    Has signature of data specific parser, so it can be run by the engines.
+
+    Args:
+        parsed_data (Any): lxml Element object representing county XML data
+        nuts (str): NUTS code of the county
+
+    Returns:
+        list[dict[str, str]]: index entries with `key`, `name`, `nuts` and `code` keys
+    """
+    return [
+        {
+            "key": normalize_name(element.attrib["NAZEVZAST"]),
+            "name": element.attrib["NAZEVZAST"],
+            "nuts": nuts,
+            "code": element.attrib["KODZASTUP"],
+        }
+        for element in parsed_data.iterfind("{*}OBEC")
+    ]
+
+
+def sort_index(entries: list[dict[str, str]]) -> list[dict[str, str]]:
+    """Sorts index entries by normalized name, so they can be searched by prefix.
+
+    Args:
+        entries (list[dict[str, str]]): index entries
+
+    Returns:
+        list[dict[str, str]]: sorted entries
+    """
+    return sorted(
+        entries, key=lambda entry: (entry["key"], entry["nuts"], entry["code"])
+    )
+
+
+def save_index(
+    entries: list[dict[str, str]], location: str = "city_index.json"
+) -> None:
+    """Saves the index into .json file.
+
+    Args:
+        entries (list[dict[str, str]]): index entries
+        location (str, optional): filepath of the index. Defaults to "city_index.json".
+    """
+    with open(location, mode="w", encoding="utf-8") as index_file:
+        json.dump(sort_index(entries), index_file, ensure_ascii=False)
+
+
+def load_index(location: str = "city_index.json") -> list[dict[str, str]]:
+    """Loads the index from .json file.
+
+    Args:
+        location (str, optional): filepath of the index. Defaults to "city_index.json".
+
+    Raises:
+        FileNotFoundError: if the index does not exist
+
+    Returns:
+        list[dict[str, str]]: index entries, sorted by `save_index`
+    """
+    if not isfile(location):
+        raise FileNotFoundError(f"City index {location} does not exist.")
+
+    with open(location, mode="r", encoding="utf-8") as index_file:
+        return json.load(index_file)
+
+
+def search(
+    entries: list[dict[str, str]],
+    name: str,
+    prefix: bool = False,
+    nuts: Optional[str] = None,
+) -> list[dict[str, str]]:
+    """Searches the sorted index for the municipality name.
+
+    Args:
+        entries (list[dict[str, str]]): sorted index entries
+        name (str): municipality name, case and diacritics insensitive
+        prefix (bool, optional): if True, all municipalities with names starting
+        with `name` are returned. Defaults to False.
+        nuts (Optional[str], optional): if provided, only municipalities from counties
+        with NUTS starting with `nuts` are returned, e.g. `CZ064` for one region.
+        Defaults to None.
+
+    Returns:
+        list[dict[str, str]]: matching entries
+    """
+    key: str = normalize_name(name)
+    start: int = bisect_left(entries, key, key=lambda entry: entry["key"])
+    output: list[dict[str, str]] = []
+
+    for entry in islice(entries, start, None):
+        if entry["key"] == key or (prefix and entry["key"].startswith(key)):
+            if nuts is None or entry["nuts"].startswith(nuts):
+                output.append(entry)
+            continue
+        break
+
+    return output
@@ -1,15 +1,31 @@
 """Handles IO operations.
 """
 import pickle
+from collections import OrderedDict
+from contextlib import contextmanager
 from csv import reader
 from datetime import datetime, timedelta
-from os.path import isfile
-from typing import Any, Callable, Optional
+from hashlib import sha256
+from os import getpid, makedirs, remove, replace
+from os.path import dirname, isfile, join
+from threading import RLock, get_ident
+from typing import Any, Callable, Iterator, Optional
+from zlib import compress, decompress
 
 from pytomlpp import loads
 
 from src.utils import replace_substring
 
+try:
+    from fcntl import LOCK_EX, LOCK_UN, flock
+except ImportError:  # not available on Windows
+    flock = None  # type: ignore
+
+_CACHE_LOCK = RLock()
+_MEMORY_CACHE: OrderedDict[str, Any] = OrderedDict()
+# running total of bytes held by _MEMORY_CACHE, kept in list to be mutable in place
+_MEMORY_CACHE_BYTES: list[int] = [0]
+
 
 def load_config(filepath: str = "config.toml") -> dict[str, Any]:
     """Loads configuration file.
@@ -24,18 +40,19 @@ def load_config(filepath: str = "config.toml") -> dict[str, Any]:
         return loads(toml_file.read())
 
 
-def read_csv(filepath: str) -> list[list[str]]:
+def read_csv(filepath: str, delimiter: str = ";") -> list[list[str]]:
     """Reads csv file and return the content.
 
     Args:
         filepath (str): filepath to .csv file
+        delimiter (str, optional): column delimiter. Defaults to ";".
 
     Returns:
         list[list[str]]: parsed content
     """
     content: list[list[str]] = []
     with open(filepath, mode="r", encoding="utf-8") as csv_file:
-        csv_reader = reader(csv_file, delimiter=";")
+        csv_reader = reader(csv_file, delimiter=delimiter)
 
         for row in csv_reader:
             content.append(row)
@@ -55,7 +72,7 @@ def read_nuts(
     Returns:
         dict[str, str]: parsed content of the nuts.csv file
     """
-    content: list[list[str]] = read_csv(filepath)
+    content: list[list[str]] = read_csv(filepath, delimiter=",")
     output: dict[str, str] = {}
 
     if header:
@@ -64,7 +81,7 @@ def read_nuts(
     for pair in content:
         assert len(pair) == 2
         nuts, county = pair
-        if hasattr(output, nuts):
+        if nuts in output:
             raise KeyError(
                 f"Record with {nuts} NUTS key was already found before. This value must be unique!."
             )
@@ -112,59 +129,321 @@ def read_psrkl(
     return output
 
 
-def process_cache(
+def read_cache(cache_location: str) -> dict[str, Any]:
+    """Reads the pickled cache metadata file and returns its content.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+
+    Returns:
+        dict[str, Any]: cache metadata, empty `dict`, if the file does not exist
+    """
+    if not isfile(cache_location):
+        return {}
+
+    with open(cache_location, mode="rb") as read_handle:
+        return pickle.load(read_handle)
+
+
+def write_cache(cache_location: str, cache: dict[str, Any]) -> None:
+    """Writes the cache metadata into the pickled cache file.
+
+    File is written into temporary file first and then moved over
+    the original, so readers never see partially written cache.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+        cache (dict[str, Any]): cache metadata
+    """
+    tmp_location: str = f"{cache_location}.{getpid()}.{get_ident()}"
+    with open(tmp_location, mode="wb") as write_handle:
+        pickle.dump(cache, write_handle)
+    replace(tmp_location, cache_location)
+
+
+def blob_path(cache_location: str, digest: str) -> str:
+    """Returns path of the cache blob with given `digest`.
+
+    Blobs are stored in `<cache_location>.blobs` directory next to the metadata file.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+        digest (str): sha256 hex digest of the blob content
+
+    Returns:
+        str: path to the blob file
+    """
+    return join(f"{cache_location}.blobs", f"{digest}.zlib")
+
+
+def write_blob(cache_location: str, data: bytes, compression_level: int = 6) -> str:
+    """Stores `data` compressed, addressed by its content hash.
+
+    If blob with the same content already exists, nothing is written.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+        data (bytes): data to be stored
+        compression_level (int, optional): zlib compression level 0 - 9. Defaults to 6.
+
+    Returns:
+        str: sha256 hex digest of the `data`
+    """
+    digest: str = sha256(data).hexdigest()
+    location: str = blob_path(cache_location, digest)
+
+    if not isfile(location):
+        makedirs(dirname(location), exist_ok=True)
+        tmp_location: str = f"{location}.{getpid()}.{get_ident()}"
+        with open(tmp_location, mode="wb") as write_handle:
+            write_handle.write(compress(data, compression_level))
+        replace(tmp_location, location)
+
+    return digest
+
+
+def read_blob(cache_location: str, digest: str) -> bytes:
+    """Reads and decompresses the blob with given `digest`.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+        digest (str): sha256 hex digest of the blob content
+
+    Raises:
+        FileNotFoundError: if the blob does not exist
+
+    Returns:
+        bytes: decompressed blob content
+    """
+    with open(blob_path(cache_location, digest), mode="rb") as read_handle:
+        return decompress(read_handle.read())
+
+
+def remove_blob(cache_location: str, cache: dict[str, Any], digest: str) -> None:
+    """Removes the blob, if it is not referenced by any `cache` entry anymore.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+        cache (dict[str, Any]): cache metadata
+        digest (str): sha256 hex digest of the blob content
+    """
+    if any(entry.get("digest") == digest for entry in cache.values()):
+        return
+
+    location: str = blob_path(cache_location, digest)
+    if isfile(location):
+        remove(location)
+
+
+def get_resource_url(resource_template: Optional[str], **kwargs) -> str:
+    """Returns resource URL of the cached api call, which serves as the cache key.
+
+    Args:
+        resource_template (Optional[str]): resource template of the api call
+
+    Returns:
+        str: resource URL
+    """
+    if resource_template:
+        return replace_substring(kwargs["resource"], kwargs["nuts"], resource_template)
+    return kwargs["resource"]
+
+
+@contextmanager
+def cache_lock(cache_location: str) -> Iterator[None]:
+    """Locks the disk cache for threads of this process and for other processes.
+
+    Other processes are locked out by `flock` of `<cache_location>.lock` file,
+    so workers sharing the cache do not overwrite each other's metadata
+    or remove each other's blobs. On platforms without `flock`, only threads
+    are locked out.
+
+    Args:
+        cache_location (str): where is cache metadata file stored
+
+    Yields:
+        Iterator[None]: lock is held inside the `with` block
+    """
+    with _CACHE_LOCK:
+        if flock is None:
+            yield
+            return
+
+        makedirs(dirname(cache_location) or ".", exist_ok=True)
+        with open(f"{cache_location}.lock", mode="a", encoding="utf-8") as lock_file:
+            flock(lock_file, LOCK_EX)
+            try:
+                yield
+            finally:
+                flock(lock_file, LOCK_UN)
+
+
+def process_memory_cache(
     time_delta: int,
-    cache_location: str,
     func: Callable,
     resource_template: Optional[str],
     *args,
+    max_bytes: int = 0,
+    compression_level: int = 6,
     **kwargs,
 ) -> Any:
-    """Processes cache.
+    """Processes in-memory cache. Cached data live only as long as the process.
+
+    Data are kept pickled and compressed. If `max_bytes` is set, least recently
+    used entries are evicted once the cache grows over it. Data larger than
+    `max_bytes` on their own are not cached at all.
 
     Args:
         time_delta (int): cache time period
-        cache_location (str): where is cache file stored
         func (Callable): function which call is being cached
         resource_template (Optional[str]): resource template of the api call
+        max_bytes (int, optional): max size of all cached data in bytes, `0` means
+        unlimited. Defaults to 0.
+        compression_level (int, optional): zlib compression level. Defaults to 6.
 
     Returns:
         Any - returns data of the cached func
     """
+    resource_url: str = get_resource_url(resource_template, **kwargs)
+
+    with _CACHE_LOCK:
+        entry: Optional[dict[str, Any]] = _MEMORY_CACHE.get(resource_url)
+
+        if entry is not None and datetime.now() <= (
+            entry["timestamp"] + timedelta(seconds=time_delta)
+        ):
+            _MEMORY_CACHE.move_to_end(resource_url)
+            return pickle.loads(decompress(entry["data"]))
+
+    returned: Any = func(*args, **kwargs)
+    data: bytes = compress(pickle.dumps(returned), compression_level)
+
+    with _CACHE_LOCK:
+        previous: Optional[dict[str, Any]] = _MEMORY_CACHE.pop(resource_url, None)
+        if previous is not None:
+            _MEMORY_CACHE_BYTES[0] -= len(previous["data"])
+
+        if max_bytes and len(data) > max_bytes:
+            return returned
+
+        _MEMORY_CACHE[resource_url] = {"timestamp": datetime.now(), "data": data}
+        _MEMORY_CACHE_BYTES[0] += len(data)
+
+        while max_bytes and _MEMORY_CACHE_BYTES[0] > max_bytes:
+            _, evicted = _MEMORY_CACHE.popitem(last=False)
+            _MEMORY_CACHE_BYTES[0] -= len(evicted["data"])
+
+    return returned
+
+
+def memory_cache_size() -> int:
+    """Returns size of all data held by in-memory cache in bytes.
+
+    Returns:
+        int: size in bytes
+    """
+    with _CACHE_LOCK:
+        return _MEMORY_CACHE_BYTES[0]
+
+
+def evict_entries(
+    cache_location: str, cache: dict[str, Any], max_entries: int
+) -> dict[str, Any]:
+    """Removes the oldest entries from the cache metadata, so at most `max_entries`
+    are left. Blobs not referenced anymore are removed as well.
 
-    def write_cache(key: str, cache: dict[str, Any]):
-        cache[key]["timestamp"] = datetime.now()
-        cache[key]["returned"] = func(*args, **kwargs)
-        with open(cache_location, mode="wb") as write_handle:
-            pickle.dump(cache, write_handle)
+    Args:
+        cache_location (str): where is cache metadata file stored
+        cache (dict[str, Any]): cache metadata
+        max_entries (int): max number of entries, `0` means unlimited
+
+    Returns:
+        dict[str, Any]: cache metadata without evicted entries
+    """
+    if not max_entries or len(cache) <= max_entries:
         return cache
 
-    if resource_template:
-        resource_url: str = replace_substring(
-            kwargs["resource"], kwargs["nuts"], resource_template
-        )
-    else:
-        resource_url = kwargs["resource"]
+    by_age: list[str] = sorted(cache, key=lambda url: cache[url]["timestamp"])
+    evicted: list[str] = by_age[: len(cache) - max_entries]
+    digests: set[str] = {
+        cache[url]["digest"] for url in evicted if "digest" in cache[url]
+    }
+    kept: dict[str, Any] = {url: cache[url] for url in by_age[len(evicted) :]}
 
-    cache: dict[str, Any] = {}
+    for digest in digests:
+        remove_blob(cache_location, kept, digest)
 
-    if not isfile(cache_location):
-        cache[resource_url] = {}
-        cache = write_cache(resource_url, cache)
-        return cache[resource_url]["returned"]
+    return kept
 
-    with open(cache_location, mode="rb") as read_handle:
-        cache = pickle.load(read_handle)
 
-    if resource_url not in list(cache.keys()):
-        cache[resource_url] = {}
-        cache = write_cache(resource_url, cache)
-        return cache[resource_url]["returned"]
+def process_cache(
+    time_delta: int,
+    cache_location: str,
+    func: Callable,
+    resource_template: Optional[str],
+    *args,
+    compression_level: int = 6,
+    max_entries: int = 0,
+    **kwargs,
+) -> Any:
+    """Processes cache.
+
+    Returned data of the cached func are pickled, compressed and stored as blob
+    addressed by the content hash, so identical payloads are stored only once.
+    Metadata (timestamp, status, digest of the blob) are stored separately
+    in `cache_location` file. Refresh with unchanged data thus costs only
+    the metadata update.
 
-    now_: datetime = datetime.now()
+    Cache file access is guarded by lock, so cached funcs can be called
+    from several threads and processes at once, see `cache_lock`. The cached func
+    itself is called outside of the lock, thus concurrent calls for different
+    resources do not block each other.
 
-    if now_ > (cache[resource_url]["timestamp"] + timedelta(seconds=time_delta)):
-        cache = write_cache(resource_url, cache)
-        return cache[resource_url]["returned"]
+    Args:
+        time_delta (int): cache time period
+        cache_location (str): where is cache metadata file stored
+        func (Callable): function which call is being cached
+        resource_template (Optional[str]): resource template of the api call
+        compression_level (int, optional): zlib compression level of blobs. Defaults to 6.
+        max_entries (int, optional): max number of cached resources, the oldest ones are
+        evicted. `0` means unlimited. Defaults to 0.
 
-    return cache[resource_url]["returned"]
+    Returns:
+        Any - returns data of the cached func
+    """
+    resource_url: str = get_resource_url(resource_template, **kwargs)
+
+    with cache_lock(cache_location):
+        entry: Optional[dict[str, Any]] = read_cache(cache_location).get(resource_url)
+
+        # entries without digest are leftovers of the old cache format
+        if (
+            entry is not None
+            and "digest" in entry
+            and datetime.now() <= (entry["timestamp"] + timedelta(seconds=time_delta))
+        ):
+            try:
+                return pickle.loads(read_blob(cache_location, entry["digest"]))
+            except FileNotFoundError:
+                pass
+
+    returned: Any = func(*args, **kwargs)
+    data: bytes = pickle.dumps(returned)
+
+    with cache_lock(cache_location):
+        digest: str = write_blob(cache_location, data, compression_level)
+        cache: dict[str, Any] = read_cache(cache_location)
+        previous: dict[str, Any] = cache.get(resource_url, {})
+        cache[resource_url] = {
+            "timestamp": datetime.now(),
+            "status": returned[0] if isinstance(returned, tuple) else None,
+            "digest": digest,
+            "size": len(data),
+        }
+        cache = evict_entries(cache_location, cache, max_entries)
+        write_cache(cache_location, cache)
+
+        if previous.get("digest") not in (None, digest):
+            remove_blob(cache_location, cache, previous["digest"])
+
+    return returned
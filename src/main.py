@@ -1,16 +1,34 @@
 """Main.
 """
 from argparse import Namespace
+from functools import partial
+from os import getpid
+from os.path import isfile
+from socket import gethostname
+from sqlite3 import Connection
 from time import sleep
-from typing import Callable
+from typing import Any, Callable, Optional
 
 from src.api import get_county_data, get_state_data
 from src.cli import create_parser, create_subparsers, parse
-from src.io import load_config
+from src.config import get_settings, poll_interval
+from src.engine import run_async, run_sync
+from src.index import index_county_data, load_index, save_index, search
+from src.io import get_resource_url, read_nuts
 from src.output import clear_screen, enable_coloring, handle_sigint, print_colored_data
-from src.parser import parse_county_data, parse_state_data, parse_xml
+from src.parser import (
+    compile_projection,
+    parse_county_data,
+    parse_county_data_stream,
+    parse_state_data,
+    parse_xml,
+)
+from src.prefetch import county_nuts, neighbours, prefetch, prefetch_in_background
+from src.replay import read_recording, recorder, replay
+from src.shard import connect, shard_poll, shared_results, unregister
+from src.utils import read_peak_rss, reset_peak_rss
 
-config = load_config()
+config = get_settings()
 resource_county = config["api"]["resources"]["vysledky_okresy_obce"]
 resource_state = config["api"]["resources"]["vysledky_stat_kraje"]
 
@@ -18,67 +36,337 @@ resource_state = config["api"]["resources"]["vysledky_stat_kraje"]
 def main():
     """Main func."""
     handle_sigint()
-    looper(worker)
+    parsed: Namespace = parse(create_subparsers(create_parser()))
+
+    if parsed.command == "prefetch":
+        prefetcher(parsed)
+        return
+
+    if parsed.command == "replay":
+        replayer(parsed)
+        return
+
+    if parsed.command == "shard":
+        sharder(parsed)
+        return
+
+    if parsed.command == "county" and parsed.prefetch_neighbours:
+        neighbour_prefetcher(parsed)
+
+    if parsed.command == "city" and (
+        parsed.rebuild_index or not isfile(config["index"]["location"])
+    ):
+        indexer()
+
+    looper(
+        worker,
+        poll_interval(
+            "vysledky_stat_kraje"
+            if parsed.command == "state"
+            else "vysledky_okresy_obce"
+        ),
+    )
+
+
+def neighbour_prefetcher(parsed: Namespace) -> None:
+    """Warms up the cache of the other counties from the regions of selected counties
+    once, in the background.
+
+    Args:
+        parsed (Namespace): parsed CLI args of `county` command
+    """
+    nuts_codes: dict[str, str] = read_nuts()
+    prefetch_in_background(
+        [
+            (get_county_data, {"nuts": nuts, "resource": resource_county})
+            for nuts in {
+                code
+                for selected in parsed.nuts
+                for code in neighbours(selected, nuts_codes)
+            }
+            - set(parsed.nuts)
+        ]
+    )
+
+
+def indexer() -> None:
+    """Builds and saves the city index from data of all counties.
+
+    Counties, which fail to be fetched or parsed, are reported and left out of the index.
+    """
+    entries: list[dict[str, str]] = []
+    failed: list[str] = []
+
+    def report(job: dict[str, Any], exc: Exception) -> None:
+        failed.append(job["nuts"])
+        print(f"{job['nuts']}: {exc}")
+
+    run_async(
+        get_county_data,
+        parse_xml,
+        index_county_data,
+        entries.extend,
+        [
+            {"nuts": nuts, "resource": resource_county}
+            for nuts in county_nuts(read_nuts())
+        ],
+        fetch_concurrency=config["limits"]["fetch_concurrency"],
+        parse_concurrency=config["limits"]["parse_concurrency"],
+        queue_size=config["limits"]["queue_size"],
+        on_error=report,
+    )
+    save_index(entries, config["index"]["location"])
+    print(f"Indexed {len(entries)} cities into {config['index']['location']}")
+    if failed:
+        print(
+            f"{len(failed)} counties failed and are missing in the index: "
+            f"{', '.join(sorted(failed))}. Use `--rebuild-index` to retry."
+        )
+    print()
+
+
+def replayer(parsed: Namespace) -> None:
+    """Replays the recording and prints throughput and latency statistics.
+
+    Args:
+        parsed (Namespace): parsed CLI args of `replay` command
+    """
+    enable_coloring()
+    stats: dict[str, Any] = replay(
+        read_recording(parsed.recording),
+        parse_xml,
+        {"county": parse_county_data, "state": parse_state_data},
+        (lambda _: None) if parsed.quiet else print_colored_data,
+        parsed.speed,
+        stream_parsers={"county": parse_county_data_stream},
+        stream_threshold=config["limits"]["stream_threshold_bytes"],
+    )
+    print(
+        f"\nReplayed {stats['records']} records ({stats['rows']} rows) "
+        f"in {stats['elapsed']:.2f} s: {stats['records_per_second']:.1f} records/s, "
+        f"{stats['rows_per_second']:.1f} rows/s"
+    )
+    for stage, latency in stats["latency"].items():
+        print(
+            f"{stage}: "
+            + ", ".join(f"{key} {value:.2f} ms" for key, value in latency.items())
+        )
+
+
+def sharder(parsed: Namespace) -> None:
+    """Polls the share of county resources and the state resource owned by this worker.
+
+    Args:
+        parsed (Namespace): parsed CLI args of `shard` command
+
+    Raises:
+        ValueError: if `worker_ttl` does not exceed the poll interval
+    """
+    settings: dict[str, Any] = config["shard"]
+    if settings["worker_ttl"] <= config["polling"]["interval"]:
+        raise ValueError(
+            "[shard] `worker_ttl` must be greater than [polling] `interval`, "
+            "otherwise workers are considered dead between polls"
+        )
+
+    connection: Connection = connect(settings["coordinator"])
+    worker_id: str = parsed.worker_id or f"{gethostname()}-{getpid()}"
+    county_api, state_api = recorded_apis(parsed)
+    jobs: list[tuple[str, Callable, dict[str, Any]]] = [
+        (
+            get_resource_url(r"{{nuts}}", nuts=nuts, resource=resource_county),
+            county_api,
+            {"nuts": nuts, "resource": resource_county},
+        )
+        for nuts in county_nuts(read_nuts(), parsed.nuts)
+    ]
+    jobs.append((resource_state, state_api, {"resource": resource_state}))
+
+    index: int = 0
+    try:
+        while True:
+            index += 1
+            stats: dict[str, int] = shard_poll(connection, worker_id, jobs, settings)
+            print(
+                f"[{worker_id}] poll {index}: {stats['workers']} workers, "
+                f"owns {stats['owned']}/{len(jobs)} resources, fetched {stats['fetched']}, "
+                f"fresh {stats['fresh']}, failed {stats['failed']}"
+            )
+            sleep(config["polling"]["interval"])
+    finally:
+        unregister(connection, worker_id)
+
+
+def prefetcher(parsed: Namespace) -> None:
+    """Fills the cache for selected county resources and the state resource.
+
+    Args:
+        parsed (Namespace): parsed CLI args of `prefetch` command
+    """
+    county_api, state_api = recorded_apis(parsed)
+    jobs: list[tuple[Callable, dict[str, Any]]] = [
+        (county_api, {"nuts": nuts, "resource": resource_county})
+        for nuts in county_nuts(read_nuts(), parsed.nuts)
+    ]
+    jobs.append((state_api, {"resource": resource_state}))
+
+    stats: dict[str, Any] = prefetch(
+        jobs,
+        rate=parsed.rate,
+        concurrency=(
+            parsed.concurrency
+            if parsed.concurrency is not None
+            else config["limits"]["fetch_concurrency"]
+        ),
+    )
+    print(
+        f"\nPrefetched {stats['done'] - stats['failed']}/{stats['total']} resources "
+        f"in {stats['elapsed']:.1f} s ({stats['throughput']:.1f} req/s)"
+    )
+
+
+def recorded_apis(
+    parsed: Namespace,
+    county_api: Callable = get_county_data,
+    state_api: Callable = get_state_data,
+) -> tuple[Callable, Callable]:
+    """Returns county and state api funcs, wrapped by `recorder`, if `--record` is set.
+
+    Args:
+        parsed (Namespace): parsed CLI args
+        county_api (Callable, optional): county api func. Defaults to `get_county_data`.
+        state_api (Callable, optional): state api func. Defaults to `get_state_data`.
+
+    Returns:
+        tuple[Callable, Callable]: county and state api funcs
+    """
+    if not parsed.record:
+        return (county_api, state_api)
+
+    return (
+        recorder(county_api, "county", parsed.record),
+        recorder(state_api, "state", parsed.record),
+    )
 
 
-def looper(worker_: Callable) -> None:
+def looper(worker_: Callable, interval: int) -> None:
     """Loops the code inside.
 
     Args:
         worker_ (Callable): worker func.
+        interval (int): seconds between two polls, see `src.config.poll_interval`.
     """
     index: int = 0
     while True:
         index += 1
+        reset_peak_rss()
         worker_()
-        sleep(600)
+        peak_rss: Optional[int] = read_peak_rss()
+        if peak_rss is not None:
+            print(f"\nPeak RSS of the poll: {peak_rss / 1024 / 1024:.1f} MiB")
+        sleep(interval)
         clear_screen()
         print(f"Polled for {str(index + 1)} time\n")
 
 
 def worker():
     """worker func."""
+    enable_coloring()
+    parsed: Namespace = parse(create_subparsers(create_parser()))
+    limits: dict[str, Any] = config["limits"]
+    engine: Callable = (
+        partial(
+            run_async,
+            fetch_concurrency=limits["fetch_concurrency"],
+            parse_concurrency=limits["parse_concurrency"],
+            queue_size=limits["queue_size"],
+        )
+        if parsed.engine == "async"
+        else run_sync
+    )
 
-    def wrapper(
-        api_func: Callable,
-        general_parser: Callable,
-        data_specific_parser: Callable,
-        printer: Callable,
-        **kwargs,
-    ) -> None:
-        status, raw_data = api_func(**kwargs)
+    projection: Optional[dict[str, Any]] = compile_projection(
+        parsed.fields, parsed.elements
+    )
+    county_api: Callable = get_county_data
+    state_api: Callable = get_state_data
+    if parsed.shared:
+        county_api = shared_results(
+            county_api,
+            config["shard"]["coordinator"],
+            r"{{nuts}}",
+            config["shard"]["result_ttl"],
+        )
+        state_api = shared_results(
+            state_api,
+            config["shard"]["coordinator"],
+            None,
+            config["shard"]["result_ttl"],
+        )
+    county_api, state_api = recorded_apis(parsed, county_api, state_api)
 
-        if status:
-            status, parsed_data = general_parser(raw_data)
+    if parsed.command == "county":
+        city_name = parsed.name if parsed.name is not None else None
 
-            if status:
-                processed_data = data_specific_parser(parsed_data, **kwargs)
-                printer(processed_data)
-            else:
-                raise RuntimeError(f"{parsed_data}")
+        return engine(
+            county_api,
+            parse_xml,
+            parse_county_data,
+            print_colored_data,
+            [
+                {
+                    "nuts": nuts,
+                    "resource": resource_county,
+                    "city": city_name,
+                    "projection": projection,
+                }
+                for nuts in parsed.nuts
+            ],
+            stream_parser=parse_county_data_stream,
+            stream_threshold=limits["stream_threshold_bytes"],
+        )
 
-        else:
-            raise RuntimeError(f"{raw_data}")
+    if parsed.command == "city":
+        matches: list[dict[str, str]] = search(
+            load_index(config["index"]["location"]),
+            parsed.name,
+            parsed.prefix,
+            parsed.nuts,
+        )
 
-    enable_coloring()
-    parsed: Namespace = parse(create_subparsers(create_parser()))
+        if len(matches) != 1:
+            print(
+                f"Found {len(matches)} cities matching `{parsed.name}`, "
+                "pick one by `--nuts`:\n"
+            )
+            return print_colored_data(
+                [
+                    {"NAZEVZAST": match["name"], "NUTS": match["nuts"]}
+                    for match in matches
+                ]
+            )
 
-    if hasattr(parsed, "nuts"):
-        city_name = parsed.name if parsed.name is not None else None
-        return wrapper(
-            get_county_data,
+        return engine(
+            county_api,
             parse_xml,
             parse_county_data,
             print_colored_data,
-            nuts=parsed.nuts,
-            resource=resource_county,
-            city=city_name,
+            [
+                {
+                    "nuts": matches[0]["nuts"],
+                    "resource": resource_county,
+                    "code": matches[0]["code"],
+                    "projection": projection,
+                }
+            ],
+            stream_parser=parse_county_data_stream,
+            stream_threshold=limits["stream_threshold_bytes"],
         )
 
-    return wrapper(
-        get_state_data,
+    return engine(
+        state_api,
         parse_xml,
         parse_state_data,
         print_colored_data,
-        resource=resource_state,
+        [{"resource": resource_state, "projection": projection}],
     )
@@ -3,7 +3,8 @@
 """Handles the parsing of the XML data.
 """
 
-from typing import Any, Optional
+from io import BytesIO
+from typing import Any, Iterable, Optional
 
 from lxml import etree
 
@@ -35,21 +36,85 @@ def parse_xml(
         return (False, None)
 
 
+def compile_projection(
+    fields: Optional[Iterable[str]] = None, elements: Optional[Iterable[str]] = None
+) -> Optional[dict[str, Any]]:
+    """Compiles the projection, which tells the parsers which values to materialize.
+
+    Args:
+        fields (Optional[Iterable[str]], optional): names of the attributes to be kept.
+        All attributes are kept, if None. Defaults to None.
+        elements (Optional[Iterable[str]], optional): tag names (without namespace)
+        of the nested elements to be kept. All elements are kept, if None. Defaults to None.
+
+    Returns:
+        Optional[dict[str, Any]]: projection to be passed to the parsers,
+        None if both `fields` and `elements` are None
+    """
+    if fields is None and elements is None:
+        return None
+
+    return {
+        "attributes": frozenset(fields) if fields is not None else None,
+        "tags": (
+            tuple(f"{{*}}{tag}" for tag in elements) if elements is not None else ()
+        ),
+    }
+
+
+def project_attributes(
+    attrib: Any, projection: Optional[dict[str, Any]] = None
+) -> dict[str, str]:
+    """Returns attributes of the element as `dict`, limited to the `projection` attributes.
+
+    Args:
+        attrib (Any): lxml Element attributes
+        projection (Optional[dict[str, Any]], optional): see `compile_projection`.
+        Defaults to None.
+
+    Returns:
+        dict[str, str]: attributes
+    """
+    if projection is None or projection["attributes"] is None:
+        return dict(attrib)
+
+    return {
+        key: value for key, value in attrib.items() if key in projection["attributes"]
+    }
+
+
 def nested_loops(
-    level_1: Any, output: dict[str, Any], master_key: str
+    level_1: Any,
+    output: dict[str, Any],
+    master_key: str,
+    projection: Optional[dict[str, Any]] = None,
 ) -> dict[str, Any]:
     """Runs thru all nested lists of parsed xml data, appends
     them to the `output` dict and returns the dict.
 
+    If `projection` is provided, only the nested elements with projection tags are
+    visited and only the projection attributes are kept. Elements without any of
+    the attributes are left out.
+
     Args:
         level_1 (Any): lxml Element object representing the first level of the data
         output (dict[str, Any]): final data output as `dict`
         master_key (str): first key of the output `dict`
+        projection (Optional[dict[str, Any]], optional): see `compile_projection`.
+        Defaults to None.
 
     Returns:
         dict[str, Any]: parsed nested xml data, flattened inside `list` of
         the output `dict`
     """
+    if projection is not None:
+        for level_x in level_1.iterdescendants(*projection["tags"]):
+            attributes: dict[str, str] = project_attributes(level_x.attrib, projection)
+            if attributes:
+                output[master_key]["data"].append(attributes)
+
+        return output
+
     for level_x in list(level_1):
         output[master_key]["data"].append(dict(level_x.attrib))
         nested_loops(level_x, output, master_key)
@@ -61,7 +126,11 @@ def nested_loops(
 
 
 def parse_county_data(
-    parsed_data: Any, city: Optional[str] = None, **kwargs
+    parsed_data: Any,
+    city: Optional[str] = None,
+    code: Optional[str] = None,
+    projection: Optional[dict[str, Any]] = None,
+    **kwargs,
 ) -> dict[str, Any]:
     """Parses XML object to retrieve data as `dict`.
 
@@ -70,24 +139,37 @@ def parse_county_data(
 
     In case the `city` name is provided, data for given city are returned.
 
+    In case the `code` is provided, only the `OBEC` element with given `KODZASTUP`
+    is looked up and processed.
+
     Args:
         parsed_data (Any): lxml Element object representing XML data
         city (Optional[str], optional): Name of the city from the county
         E.g. "Praha 1". Defaults to None.
+        code (Optional[str], optional): `KODZASTUP` code of the city. Defaults to None.
+        projection (Optional[dict[str, Any]], optional): values to be kept,
+        see `compile_projection`. Defaults to None.
 
     Returns:
         dict[str, Any]: parsed data from lxml Element object as `dict`.
     """
     output: dict[str, Any] = {}
-    authorities_data_level: list[Any] = list(parsed_data)
+    authorities_data_level: list[Any] = (
+        list(parsed_data)
+        if code is None
+        else parsed_data.findall(f"{{*}}OBEC[@KODZASTUP='{code}']")
+    )
     master_key: str = ""
 
     for level_1 in authorities_data_level:
         if city is None and "OBEC" in level_1.tag:
             master_key = level_1.attrib["KODZASTUP"]
-            output[master_key] = {"descriptors": dict(level_1.attrib), "data": []}
+            output[master_key] = {
+                "descriptors": project_attributes(level_1.attrib, projection),
+                "data": [],
+            }
 
-            nested_loops(level_1, output, master_key)
+            nested_loops(level_1, output, master_key, projection)
 
         if (
             city is not None
@@ -95,18 +177,76 @@ def parse_county_data(
             and city.strip() == level_1.attrib["NAZEVZAST"]
         ):
             master_key = level_1.attrib["KODZASTUP"]
-            output[master_key] = {"descriptors": dict(level_1.attrib), "data": []}
+            output[master_key] = {
+                "descriptors": project_attributes(level_1.attrib, projection),
+                "data": [],
+            }
 
-            nested_loops(level_1, output, master_key)
+            nested_loops(level_1, output, master_key, projection)
 
     return output
 
 
-def parse_state_data(parsed_data: Any, **kwargs) -> dict[str, Any]:
+def parse_county_data_stream(
+    xml_string_data: str,
+    city: Optional[str] = None,
+    code: Optional[str] = None,
+    projection: Optional[dict[str, Any]] = None,
+    encoding: str = "utf-8",
+    **kwargs,
+) -> dict[str, Any]:
+    """Streaming counterpart of `parse_county_data`, which takes raw XML string data.
+
+    Whole XML tree is never materialized, each `OBEC` element is released
+    right after it is processed. Intended for payloads too large to hold
+    both parsed tree and output `dict` in memory.
+
+    Args:
+        xml_string_data (str): XML data to be parsed.
+        city (Optional[str], optional): Name of the city from the county
+        E.g. "Praha 1". Defaults to None.
+        code (Optional[str], optional): `KODZASTUP` code of the city. Defaults to None.
+        projection (Optional[dict[str, Any]], optional): values to be kept,
+        see `compile_projection`. Defaults to None.
+        encoding (str, optional): Into which encoding the raw data string should be encoded into.
+        Defaults to "utf-8".
+
+    Returns:
+        dict[str, Any]: parsed data as `dict`, same as `parse_county_data` returns.
+    """
+    output: dict[str, Any] = {}
+    master_key: str = ""
+
+    for _, level_1 in etree.iterparse(
+        BytesIO(xml_string_data.encode(encoding)), events=("end",), tag="{*}OBEC"
+    ):
+        if (city is None or city.strip() == level_1.attrib["NAZEVZAST"]) and (
+            code is None or code == level_1.attrib["KODZASTUP"]
+        ):
+            master_key = level_1.attrib["KODZASTUP"]
+            output[master_key] = {
+                "descriptors": project_attributes(level_1.attrib, projection),
+                "data": [],
+            }
+
+            nested_loops(level_1, output, master_key, projection)
+
+        level_1.clear()
+        while level_1.getprevious() is not None:
+            del level_1.getparent()[0]
+
+    return output
+
+
+def parse_state_data(
+    parsed_data: Any, projection: Optional[dict[str, Any]] = None, **kwargs
+) -> dict[str, Any]:
     """Parses XML object to retrieve data as `dict`.
 
     Args:
         parsed_data (Any): lxml Element object representing XML data
+        projection (Optional[dict[str, Any]], optional): values to be kept,
+        see `compile_projection`. Defaults to None.
 
     Returns:
         dict[str, Any]: parsed data as `dict`.
@@ -119,7 +259,7 @@ def parse_state_data(parsed_data: Any, **kwargs) -> dict[str, Any]:
         for level_1 in top_level_data:
             master_key = level_1.attrib["OZNAC_TYPU"]
             output[master_key] = {"data": []}
-            nested_loops(level_1, output, master_key)
+            nested_loops(level_1, output, master_key, projection)
         return output
     except RuntimeError as exc:
         raise RuntimeError(f"State level XML data were not parsed!: {exc}") from exc
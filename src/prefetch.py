@@ -0,0 +1,149 @@
+# pylint: disable=broad-except
+
+"""Handles warming up of the api calls cache.
+"""
+import asyncio
+from threading import Thread
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+ABROAD_NUTS: str = "CZZZZZ"
+
+
+def county_nuts(
+    nuts: dict[str, str], prefixes: Optional[list[str]] = None
+) -> list[str]:
+    """Returns NUTS codes of counties (districts), for which county data are available.
+
+    Args:
+        nuts (dict[str, str]): content of the nuts.csv file, see `read_nuts`
+        prefixes (Optional[list[str]], optional): if provided, only counties with NUTS
+        starting with any of the prefixes are returned, e.g. `["CZ064"]` for one region.
+        Defaults to None.
+
+    Returns:
+        list[str]: NUTS codes of counties
+    """
+    return [
+        code
+        for code in nuts
+        if len(code) == 6
+        and code != ABROAD_NUTS
+        and (not prefixes or any(code.startswith(prefix) for prefix in prefixes))
+    ]
+
+
+def neighbours(code: str, nuts: dict[str, str]) -> list[str]:
+    """Returns NUTS codes of counties belonging to the same region as `code`.
+
+    Args:
+        code (str): NUTS code of the county
+        nuts (dict[str, str]): content of the nuts.csv file, see `read_nuts`
+
+    Returns:
+        list[str]: NUTS codes of neighbouring counties, `code` excluded
+    """
+    return [item for item in county_nuts(nuts, [code[:-1]]) if item != code]
+
+
+async def _prefetch(
+    jobs: list[tuple[Callable, dict[str, Any]]],
+    rate: float,
+    concurrency: int,
+    report: Optional[Callable],
+) -> dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    started: float = perf_counter()
+    next_slot: list[float] = [loop.time()]
+    stats: dict[str, Any] = {"total": len(jobs), "done": 0, "failed": 0}
+
+    async def wait_for_slot() -> None:
+        now: float = loop.time()
+        slot: float = max(now, next_slot[0])
+        next_slot[0] = slot + 1 / rate
+        await asyncio.sleep(slot - now)
+
+    async def run(func: Callable, kwargs: dict[str, Any]) -> None:
+        async with semaphore:
+            await wait_for_slot()
+            try:
+                status, _ = await asyncio.to_thread(func, **kwargs)
+            except Exception as exc:
+                status = False
+                message: str = str(exc)
+            else:
+                message = "ok" if status else "error message returned"
+
+        stats["done"] += 1
+        stats["failed"] += 0 if status else 1
+
+        if report is not None:
+            elapsed: float = perf_counter() - started
+            report(
+                f"[{stats['done']}/{stats['total']}] "
+                f"{kwargs.get('nuts', kwargs.get('resource'))}: {message} "
+                f"({stats['done'] / elapsed:.1f} req/s)"
+            )
+
+    await asyncio.gather(*[run(func, kwargs) for func, kwargs in jobs])
+
+    stats["elapsed"] = perf_counter() - started
+    stats["throughput"] = stats["done"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    return stats
+
+
+def prefetch(
+    jobs: list[tuple[Callable, dict[str, Any]]],
+    rate: float = 5.0,
+    concurrency: int = 4,
+    report: Optional[Callable] = print,
+) -> dict[str, Any]:
+    """Calls the cached api funcs concurrently, so their cache is filled.
+
+    Failed calls are reported, but do not stop the prefetch.
+
+    Args:
+        jobs (list[tuple[Callable, dict[str, Any]]]): api func and its kwargs, one tuple per call
+        rate (float, optional): max number of started calls per second. Defaults to 5.0.
+        concurrency (int, optional): max number of calls in progress. Defaults to 4.
+        report (Optional[Callable], optional): called with progress message after
+        each call. Defaults to `print`.
+
+    Raises:
+        ValueError: if `rate` or `concurrency` is not greater than zero
+
+    Returns:
+        dict[str, Any]: number of `total`, `done` and `failed` calls, `elapsed` seconds
+        and `throughput` in calls per second
+    """
+    if rate <= 0:
+        raise ValueError(f"Prefetch rate must be greater than 0, got {rate}.")
+    if concurrency <= 0:
+        raise ValueError(
+            f"Prefetch concurrency must be greater than 0, got {concurrency}."
+        )
+
+    return asyncio.run(_prefetch(jobs, rate, concurrency, report))
+
+
+def prefetch_in_background(
+    jobs: list[tuple[Callable, dict[str, Any]]], rate: float = 1.0, concurrency: int = 2
+) -> Thread:
+    """Runs quiet `prefetch` in daemon thread and returns the thread.
+
+    Args:
+        jobs (list[tuple[Callable, dict[str, Any]]]): api func and its kwargs, one tuple per call
+        rate (float, optional): max number of started calls per second. Defaults to 1.0.
+        concurrency (int, optional): max number of calls in progress. Defaults to 2.
+
+    Returns:
+        Thread: started thread
+    """
+    thread: Thread = Thread(
+        target=prefetch,
+        args=(jobs, rate, concurrency, None),
+        daemon=True,
+    )
+    thread.start()
+    return thread
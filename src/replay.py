@@ -0,0 +1,250 @@
+"""Handles recording of the fetched payloads and their replay thru the parsers.
+"""
+import json
+from hashlib import sha256
+from math import ceil
+from threading import Lock
+from time import perf_counter, sleep, time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from src.engine import exceeds_threshold
+from src.parser import compile_projection
+
+RECORDED_KWARGS: tuple[str, ...] = ("nuts", "city", "code", "projection")
+
+_RECORD_LOCK = Lock()
+# digest of the last recorded payload per recording and record key, shared by recorders
+# of the same recording, as the worker creates them on each poll
+_LAST_DIGESTS: dict[str, dict[str, str]] = {}
+
+
+def dump_projection(
+    projection: Optional[dict[str, Any]],
+) -> Optional[dict[str, Optional[list[str]]]]:
+    """Returns .json serializable form of the compiled projection.
+
+    Args:
+        projection (Optional[dict[str, Any]]): see `compile_projection`
+
+    Returns:
+        Optional[dict[str, Optional[list[str]]]]: `fields` and `elements` to be passed
+        to `compile_projection`, None if there is no projection
+    """
+    if projection is None:
+        return None
+
+    return {
+        "fields": (
+            sorted(projection["attributes"])
+            if projection["attributes"] is not None
+            else None
+        ),
+        "elements": [tag.removeprefix("{*}") for tag in projection["tags"]],
+    }
+
+
+def _record_key(kind: str, recorded: dict[str, Any]) -> str:
+    return json.dumps([kind, recorded], sort_keys=True)
+
+
+def recorder(api_func: Callable, kind: str, location: str) -> Callable:
+    """Wraps the api func, so each successfully fetched payload is appended
+    to the recording file as one .json line.
+
+    Every call is recorded, as each of them is parsed in production. Payload equal
+    to the last recorded one of the same kind and kwargs is recorded as `"same": true`
+    marker without data, which is expanded by `read_recording`.
+
+    Args:
+        api_func (Callable): api func returning `(status, data)` tuple
+        kind (str): kind of the payload, e.g. "county" or "state"
+        location (str): filepath of the recording
+
+    Returns:
+        Callable: wrapped api func
+    """
+
+    def wrapper(**kwargs) -> tuple[bool, str]:
+        status, data = api_func(**kwargs)
+
+        if status:
+            recorded: dict[str, Any] = {
+                key: kwargs[key] for key in RECORDED_KWARGS if key in kwargs
+            }
+            if "projection" in recorded:
+                recorded["projection"] = dump_projection(recorded["projection"])
+
+            key: str = _record_key(kind, recorded)
+            digest: str = sha256(data.encode("utf-8")).hexdigest()
+            record: dict[str, Any] = {
+                "time": time(),
+                "kind": kind,
+                "kwargs": recorded,
+            }
+            with _RECORD_LOCK:
+                last_digests: dict[str, str] = _LAST_DIGESTS.setdefault(location, {})
+                if last_digests.get(key) == digest:
+                    record["same"] = True
+                else:
+                    last_digests[key] = digest
+                    record["data"] = data
+
+                with open(location, mode="a", encoding="utf-8") as recording:
+                    recording.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        return (status, data)
+
+    return wrapper
+
+
+def read_recording(location: str) -> Iterator[dict[str, Any]]:
+    """Reads the recording record by record.
+
+    Records marked as `"same": true` get data of the last record with the same
+    kind and kwargs.
+
+    Args:
+        location (str): filepath of the recording
+
+    Raises:
+        ValueError: if the marked record has no preceding record with data
+
+    Yields:
+        Iterator[dict[str, Any]]: records with `time`, `kind`, `kwargs` and `data` keys
+    """
+    last_data: dict[str, str] = {}
+
+    with open(location, mode="r", encoding="utf-8") as recording:
+        for line in recording:
+            if not line.strip():
+                continue
+
+            record: dict[str, Any] = json.loads(line)
+            key: str = _record_key(record["kind"], record["kwargs"])
+
+            if record.pop("same", False):
+                if key not in last_data:
+                    raise ValueError(f"Recorded {key} has no preceding data!")
+                record["data"] = last_data[key]
+            else:
+                last_data[key] = record["data"]
+
+            yield record
+
+
+def percentile(values: list[float], quantile: float) -> float:
+    """Returns nearest-rank percentile of the values.
+
+    Args:
+        values (list[float]): measured values
+        quantile (float): quantile 0 - 100
+
+    Returns:
+        float: percentile, `0.0` for no values
+    """
+    if not values:
+        return 0.0
+
+    ordered: list[float] = sorted(values)
+    return ordered[max(ceil(quantile / 100 * len(ordered)) - 1, 0)]
+
+
+def replay(
+    records: Iterable[dict[str, Any]],
+    general_parser: Callable,
+    data_specific_parsers: dict[str, Callable],
+    printer: Callable,
+    speed: float = 0.0,
+    stream_parsers: Optional[dict[str, Callable]] = None,
+    stream_threshold: int = 0,
+) -> dict[str, Any]:
+    """Feeds recorded payloads thru the parsers and printer, keeping their recorded
+    timing compressed by `speed`.
+
+    Payloads larger than `stream_threshold` are parsed by the stream parser of their kind,
+    as in `engine.parse`, and timed as `parse_stream` stage. Other payloads are timed
+    as `parse_xml` (general parser) and `parse_data` (data specific parser) stages.
+
+    Args:
+        records (Iterable[dict[str, Any]]): records, see `read_recording`
+        general_parser (Callable): parser of the raw data, returning `(status, parsed)`
+        data_specific_parsers (dict[str, Callable]): data specific parser for each record kind
+        printer (Callable): output func
+        speed (float, optional): time compression, e.g. `60` replays one hour in one minute.
+        `0` replays as fast as possible. Defaults to 0.0.
+        stream_parsers (Optional[dict[str, Callable]], optional): stream parser
+        for each record kind, see `engine.parse`. Defaults to None.
+        stream_threshold (int, optional): see `engine.parse`. Defaults to 0.
+
+    Raises:
+        RuntimeError: if the payload could not be parsed
+
+    Returns:
+        dict[str, Any]: number of `records` and parsed `rows`, `elapsed` seconds,
+        `records_per_second`, `rows_per_second` and `latency` of each used stage as
+        `{"parse_xml": {"p50": ..., "p95": ..., "p99": ...}, ...}` in milliseconds
+    """
+    latencies: dict[str, list[float]] = {
+        "parse_xml": [],
+        "parse_data": [],
+        "parse_stream": [],
+        "output": [],
+    }
+    stats: dict[str, Any] = {"records": 0, "rows": 0}
+    started: float = perf_counter()
+    first_recorded: float = 0.0
+
+    for record in records:
+        if stats["records"] == 0:
+            first_recorded = record["time"]
+
+        if speed > 0:
+            due: float = (record["time"] - first_recorded) / speed
+            delay: float = due - (perf_counter() - started)
+            if delay > 0:
+                sleep(delay)
+
+        kwargs: dict[str, Any] = dict(record["kwargs"])
+        if kwargs.get("projection") is not None:
+            kwargs["projection"] = compile_projection(**kwargs["projection"])
+
+        stream_parser: Optional[Callable] = (stream_parsers or {}).get(record["kind"])
+        stage_started: float = perf_counter()
+
+        if stream_parser is not None and exceeds_threshold(
+            record["data"], stream_threshold
+        ):
+            processed: Any = stream_parser(record["data"], **kwargs)
+            processed_at: float = perf_counter()
+            latencies["parse_stream"].append(processed_at - stage_started)
+        else:
+            status, parsed_data = general_parser(record["data"])
+            if not status:
+                raise RuntimeError(f"Recorded {record['kind']} payload was not parsed!")
+            parsed_at: float = perf_counter()
+            processed = data_specific_parsers[record["kind"]](parsed_data, **kwargs)
+            processed_at = perf_counter()
+            latencies["parse_xml"].append(parsed_at - stage_started)
+            latencies["parse_data"].append(processed_at - parsed_at)
+
+        printer(processed)
+        latencies["output"].append(perf_counter() - processed_at)
+        stats["records"] += 1
+        stats["rows"] += sum(len(value.get("data", [])) for value in processed.values())
+
+    stats["elapsed"] = perf_counter() - started
+    stats["records_per_second"] = (
+        stats["records"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    )
+    stats["rows_per_second"] = (
+        stats["rows"] / stats["elapsed"] if stats["elapsed"] else 0.0
+    )
+    stats["latency"] = {
+        stage: {
+            f"p{quantile}": percentile(values, quantile) * 1000
+            for quantile in (50, 95, 99)
+        }
+        for stage, values in latencies.items()
+        if values
+    }
+    return stats
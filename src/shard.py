@@ -0,0 +1,340 @@
+# pylint: disable=broad-except
+
+"""Handles sharded polling of the api resources by several workers.
+
+Workers register in a coordinator (sqlite database shared by all workers)
+by heartbeats. Resources are partitioned among live workers by consistent
+hashing, leases prevent two workers from fetching the same resource during
+rebalancing and fetched results are shared via the coordinator, so
+any worker or consumer can read them, see `shared_results`.
+"""
+import sqlite3
+from bisect import bisect
+from hashlib import sha1
+from time import time
+from typing import Any, Callable, Optional
+from zlib import compress, decompress
+
+from src.io import get_resource_url
+
+SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    resource TEXT PRIMARY KEY,
+    worker_id TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    resource TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    status INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+
+def connect(location: str = "shard.sqlite") -> sqlite3.Connection:
+    """Connects to the coordinator database, creating the tables if needed.
+
+    Args:
+        location (str, optional): filepath of the sqlite database. Defaults to "shard.sqlite".
+
+    Returns:
+        sqlite3.Connection: connection in autocommit mode
+    """
+    connection: sqlite3.Connection = sqlite3.connect(
+        location, timeout=30, isolation_level=None
+    )
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def heartbeat(
+    connection: sqlite3.Connection, worker_id: str, now: Optional[float] = None
+) -> None:
+    """Registers the worker as alive.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        worker_id (str): unique worker identifier
+        now (Optional[float], optional): current unix time. Defaults to `time()`.
+    """
+    connection.execute(
+        "INSERT INTO workers VALUES (?, ?) "
+        "ON CONFLICT(worker_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+        (worker_id, time() if now is None else now),
+    )
+
+
+def unregister(connection: sqlite3.Connection, worker_id: str) -> None:
+    """Removes the worker and its leases, so its resources are rebalanced immediately.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        worker_id (str): unique worker identifier
+    """
+    connection.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+    connection.execute("DELETE FROM leases WHERE worker_id = ?", (worker_id,))
+
+
+def live_workers(
+    connection: sqlite3.Connection, worker_ttl: float, now: Optional[float] = None
+) -> list[str]:
+    """Returns workers, which sent heartbeat within `worker_ttl` seconds.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        worker_ttl (float): seconds after the last heartbeat, when worker is considered dead
+        now (Optional[float], optional): current unix time. Defaults to `time()`.
+
+    Returns:
+        list[str]: sorted worker identifiers
+    """
+    rows: list[tuple[str]] = connection.execute(
+        "SELECT worker_id FROM workers WHERE heartbeat >= ? ORDER BY worker_id",
+        ((time() if now is None else now) - worker_ttl,),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+def build_ring(workers: list[str], replicas: int = 64) -> list[tuple[int, str]]:
+    """Builds consistent hashing ring of the workers.
+
+    Args:
+        workers (list[str]): worker identifiers
+        replicas (int, optional): number of virtual nodes per worker. Defaults to 64.
+
+    Returns:
+        list[tuple[int, str]]: sorted ring of `(hash, worker)` nodes
+    """
+    return sorted(
+        (_hash(f"{worker}#{replica}"), worker)
+        for worker in workers
+        for replica in range(replicas)
+    )
+
+
+def owner(ring: list[tuple[int, str]], key: str) -> str:
+    """Returns the worker owning the `key`.
+
+    Args:
+        ring (list[tuple[int, str]]): ring, see `build_ring`
+        key (str): key to be assigned, e.g. resource URL
+
+    Raises:
+        ValueError: if the ring is empty
+
+    Returns:
+        str: worker identifier
+    """
+    if not ring:
+        raise ValueError("There are no workers in the ring!")
+
+    index: int = bisect(ring, (_hash(key), "")) % len(ring)
+    return ring[index][1]
+
+
+def acquire_lease(
+    connection: sqlite3.Connection,
+    resource: str,
+    worker_id: str,
+    duration: float,
+    now: Optional[float] = None,
+) -> bool:
+    """Acquires the lease of the `resource` for the worker.
+
+    Lease is granted, if nobody holds it, it expired, or the worker already holds it.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        resource (str): resource URL
+        worker_id (str): unique worker identifier
+        duration (float): lease duration in seconds
+        now (Optional[float], optional): current unix time. Defaults to `time()`.
+
+    Returns:
+        bool: whether the lease was acquired
+    """
+    now_: float = time() if now is None else now
+    cursor: sqlite3.Cursor = connection.execute(
+        "INSERT INTO leases VALUES (?, ?, ?) "
+        "ON CONFLICT(resource) DO UPDATE SET "
+        "worker_id = excluded.worker_id, expires = excluded.expires "
+        "WHERE leases.expires < ? OR leases.worker_id = excluded.worker_id",
+        (resource, worker_id, now_ + duration, now_),
+    )
+    return cursor.rowcount == 1
+
+
+def store_result(
+    connection: sqlite3.Connection,
+    resource: str,
+    returned: tuple[bool, str],
+    now: Optional[float] = None,
+) -> None:
+    """Stores data returned by the api func, so other workers and consumers can use them.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        resource (str): resource URL
+        returned (tuple[bool, str]): status and data returned by the api func
+        now (Optional[float], optional): current unix time. Defaults to `time()`.
+    """
+    connection.execute(
+        "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+        (
+            resource,
+            time() if now is None else now,
+            returned[0],
+            compress(returned[1].encode("utf-8")),
+        ),
+    )
+
+
+def read_result(
+    connection: sqlite3.Connection, resource: str
+) -> Optional[tuple[float, tuple[bool, str]]]:
+    """Reads shared result of the resource.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        resource (str): resource URL
+
+    Returns:
+        Optional[tuple[float, tuple[bool, str]]]: unix time of the fetch and
+        status and data returned by the api func, None if the resource was not fetched yet
+    """
+    row: Optional[tuple[float, int, bytes]] = connection.execute(
+        "SELECT fetched_at, status, data FROM results WHERE resource = ?", (resource,)
+    ).fetchone()
+    if row is None:
+        return None
+    return (row[0], (bool(row[1]), decompress(row[2]).decode("utf-8")))
+
+
+def shared_results(
+    api_func: Callable,
+    location: str,
+    resource_template: Optional[str],
+    max_age: float,
+) -> Callable:
+    """Wraps the api func, so results fetched by the shard workers are read
+    from the coordinator. Resources missing there or older than `max_age` seconds
+    are fetched by the api func.
+
+    Coordinator is connected on each call, so the wrapped func can be called
+    from any thread.
+
+    Args:
+        api_func (Callable): api func returning `(status, data)` tuple
+        location (str): filepath of the coordinator database
+        resource_template (Optional[str]): resource template of the api func,
+        see `get_resource_url`
+        max_age (float): max age of the shared result in seconds
+
+    Returns:
+        Callable: wrapped api func
+    """
+
+    def wrapper(**kwargs) -> tuple[bool, str]:
+        connection: sqlite3.Connection = connect(location)
+        try:
+            result: Optional[tuple[float, tuple[bool, str]]] = read_result(
+                connection, get_resource_url(resource_template, **kwargs)
+            )
+        finally:
+            connection.close()
+
+        if result is not None and result[0] + max_age > time():
+            return result[1]
+        return api_func(**kwargs)
+
+    return wrapper
+
+
+def shard_poll(
+    connection: sqlite3.Connection,
+    worker_id: str,
+    jobs: list[tuple[str, Callable, dict[str, Any]]],
+    settings: dict[str, Any],
+    now: Optional[float] = None,
+    report: Optional[Callable] = print,
+) -> dict[str, int]:
+    """Runs one poll of the worker.
+
+    Sends heartbeat, builds the ring of live workers and fetches the resources
+    the worker owns, whose shared results are older than `result_ttl`.
+    Dead workers drop out of the ring after `worker_ttl`, so their resources are
+    rebalanced to the live ones. Failed fetches are not stored, so they are
+    retried by the next poll.
+
+    Args:
+        connection (sqlite3.Connection): coordinator connection
+        worker_id (str): unique worker identifier
+        jobs (list[tuple[str, Callable, dict[str, Any]]]): resource URL, api func
+        and its kwargs, one tuple per resource
+        settings (dict[str, Any]): `[shard]` configuration section
+        now (Optional[float], optional): current unix time. Defaults to `time()`.
+        report (Optional[Callable], optional): called with a message about each
+        fetched resource, None disables reporting. Defaults to `print`.
+
+    Returns:
+        dict[str, int]: number of `owned`, `fetched`, `fresh` (skipped) and
+        `failed` resources and number of live `workers`
+    """
+    now_: float = time() if now is None else now
+    heartbeat(connection, worker_id, now_)
+    workers: list[str] = live_workers(connection, settings["worker_ttl"], now_)
+    ring: list[tuple[int, str]] = build_ring(workers, settings["replicas"])
+    stats: dict[str, int] = {
+        "workers": len(workers),
+        "owned": 0,
+        "fetched": 0,
+        "fresh": 0,
+        "failed": 0,
+    }
+
+    for resource, api_func, kwargs in jobs:
+        if owner(ring, resource) != worker_id:
+            continue
+        stats["owned"] += 1
+
+        result: Optional[tuple[float, tuple[bool, str]]] = read_result(
+            connection, resource
+        )
+        if result is not None and result[0] + settings["result_ttl"] > now_:
+            stats["fresh"] += 1
+            continue
+
+        if not acquire_lease(
+            connection, resource, worker_id, settings["lease_duration"], now_
+        ):
+            continue
+
+        try:
+            returned: tuple[bool, str] = api_func(**kwargs)
+        except Exception as exc:
+            returned = (False, str(exc))
+
+        if returned[0]:
+            store_result(connection, resource, returned, now_)
+            stats["fetched"] += 1
+            message: str = "ok"
+        else:
+            stats["failed"] += 1
+            message = returned[1]
+
+        if report is not None:
+            report(
+                f"[{stats['fetched'] + stats['failed']}/{stats['owned']}] "
+                f"{resource}: {message}"
+            )
+
+    return stats
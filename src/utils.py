@@ -1,5 +1,12 @@
 """Utilities.
 """
+from sys import platform as sys_platform
+from typing import Optional
+
+try:
+    from resource import RUSAGE_SELF, getrusage
+except ImportError:  # not available on Windows
+    getrusage = None  # type: ignore
 
 
 def retrieve_error_message(data: str, start_tag: str = "<CHYBA>") -> str:
@@ -43,3 +50,43 @@ def replace_substring(string: str, substring: str, template: str) -> str:
         str: string with substring instead of the template
     """
     return string.replace(template, substring)
+
+
+def reset_peak_rss() -> bool:
+    """Resets the peak resident set size of the process, so the next `read_peak_rss`
+    measures peak since now. Supported only on Linux.
+
+    Returns:
+        bool: whether the peak was reset
+    """
+    try:
+        with open("/proc/self/clear_refs", mode="w", encoding="utf-8") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def read_peak_rss() -> Optional[int]:
+    """Returns the peak resident set size of the process in bytes.
+
+    On Linux the peak since the last `reset_peak_rss` is returned,
+    elsewhere the peak since the process start.
+
+    Returns:
+        Optional[int]: peak RSS in bytes, None if it cannot be measured
+    """
+    try:
+        with open("/proc/self/status", mode="r", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if getrusage is None:
+        return None
+
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    peak: int = getrusage(RUSAGE_SELF).ru_maxrss
+    return peak if sys_platform == "darwin" else peak * 1024
@@ -0,0 +1,20 @@
+# pylint: disable=missing-function-docstring
+"""Shared test fixtures.
+"""
+
+from pytest import fixture
+
+
+def read_data(filename: str) -> str:
+    with open(f"test/data/{filename}", mode="r", encoding="utf-8") as xml_file:
+        return xml_file.read()
+
+
+@fixture(scope="session")
+def county_xml() -> str:
+    return read_data("county.xml")
+
+
+@fixture(scope="session")
+def state_xml() -> str:
+    return read_data("state.xml")
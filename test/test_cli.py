@@ -0,0 +1,52 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing CLI args parsing.
+"""
+
+from hamcrest import assert_that, calling, equal_to, has_properties, raises
+from src.cli import create_parser, create_subparsers, parse
+
+
+class TestCli:
+    def test_no_subcommand_outputs_state_data(self):
+        assert_that(
+            parse(create_subparsers(create_parser()), []),
+            has_properties(command="state", fields=None, elements=None),
+        )
+
+    def test_subcommand_sets_command(self):
+        parsed = parse(create_subparsers(create_parser()), ["county", "CZ0100"])
+        assert_that(parsed.command, equal_to("county"))
+        assert_that(parsed.nuts, equal_to(["CZ0100"]))
+
+    def test_prefetch_rate_must_be_positive(self):
+        parser = create_subparsers(create_parser())
+        for rate in ["0", "-1", "fast"]:
+            assert_that(
+                calling(parse).with_args(parser, ["prefetch", "--rate", rate]),
+                raises(SystemExit),
+            )
+        assert_that(parse(parser, ["prefetch", "--rate", "2.5"]).rate, equal_to(2.5))
+
+    def test_prefetch_concurrency_must_be_positive(self):
+        parser = create_subparsers(create_parser())
+        for concurrency in ["0", "-2", "1.5"]:
+            assert_that(
+                calling(parse).with_args(
+                    parser, ["prefetch", "--concurrency", concurrency]
+                ),
+                raises(SystemExit),
+            )
+        assert_that(
+            parse(parser, ["prefetch", "--concurrency", "3"]).concurrency, equal_to(3)
+        )
+        assert_that(parse(parser, ["prefetch"]).concurrency, equal_to(None))
+
+    def test_replay_speed_must_not_be_negative(self):
+        parser = create_subparsers(create_parser())
+        assert_that(
+            calling(parse).with_args(parser, ["replay", "rec.jsonl", "--speed", "-1"]),
+            raises(SystemExit),
+        )
+        assert_that(
+            parse(parser, ["replay", "rec.jsonl", "--speed", "0"]).speed, equal_to(0.0)
+        )
@@ -0,0 +1,78 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing configuration validation.
+"""
+
+from hamcrest import assert_that, calling, contains_string, equal_to, raises
+from src.config import cache_policy, get_settings, poll_interval, validate_config
+
+api: dict = {"resources": {"county": "/okres?nuts={{nuts}}", "state": "/stat"}}
+
+
+class TestConfig:
+    def test_repository_config_is_valid(self):
+        settings = get_settings()
+        assert_that(cache_policy("vysledky_stat_kraje", settings)["ttl"], equal_to(60))
+        assert_that(
+            cache_policy("vysledky_okresy_obce", settings)["ttl"], equal_to(600)
+        )
+
+    def test_poll_interval_follows_resource_ttl(self):
+        settings = validate_config(
+            {
+                "api": api,
+                "polling": {"interval": 600},
+                "cache": {"ttl": 900, "resources": {"state": {"ttl": 60}}},
+            }
+        )
+        assert_that(poll_interval("state", settings), equal_to(60))
+        assert_that(poll_interval("county", settings), equal_to(600))
+        assert_that(poll_interval(None, settings), equal_to(600))
+
+        settings["cache"]["resources"]["state"]["ttl"] = 0
+        assert_that(poll_interval("state", settings), equal_to(600))
+
+    def test_defaults_are_filled_in(self):
+        settings = validate_config({"api": api})
+        assert_that(settings["polling"]["interval"], equal_to(600))
+        assert_that(settings["index"]["location"], equal_to("city_index.json"))
+        assert_that(cache_policy("county", settings)["backend"], equal_to("disk"))
+
+    def test_resource_overrides_defaults(self):
+        settings = validate_config(
+            {
+                "api": api,
+                "cache": {"ttl": 300, "resources": {"state": {"backend": "memory"}}},
+            }
+        )
+        assert_that(
+            cache_policy("state", settings),
+            equal_to(
+                {
+                    "ttl": 300,
+                    "backend": "memory",
+                    "location": "cache.tmp",
+                    "compression_level": 6,
+                }
+            ),
+        )
+        assert_that(cache_policy("county", settings)["backend"], equal_to("disk"))
+
+    def test_invalid_values_are_rejected(self):
+        config = {
+            "api": api,
+            "polling": {"interval": -1},
+            "limits": {"queue_size": "8"},
+            "cache": {"resources": {"unknown": {"ttl": 1}}},
+        }
+        assert_that(
+            calling(validate_config).with_args(config),
+            raises(ValueError, "(?s)interval.*queue_size.*unknown"),
+        )
+
+    def test_unknown_key_is_rejected(self):
+        assert_that(
+            calling(validate_config).with_args(
+                {"api": api, "cache": {"resources": {"state": {"tll": 1}}}}
+            ),
+            raises(ValueError, "unknown key `tll`"),
+        )
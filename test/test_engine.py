@@ -0,0 +1,86 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring, redefined-outer-name
+"""Testing pipeline engines.
+"""
+
+from typing import Callable
+
+from hamcrest import assert_that, calling, contains_inanyorder, equal_to, raises
+from pytest import fixture
+from src.engine import exceeds_threshold, run_async, run_sync
+from src.parser import parse_county_data, parse_xml
+
+
+@fixture
+def county_api(county_xml) -> Callable:
+    def fake_county_data(nuts: str = None, **kwargs) -> tuple[bool, str]:
+        if nuts == "CZ01":
+            return (False, "<CHYBA>Chyba</CHYBA>")
+        return (True, county_xml)
+
+    return fake_county_data
+
+
+def run(api: Callable, engine: Callable, jobs: list, **kwargs) -> list:
+    output: list = []
+    engine(api, parse_xml, parse_county_data, output.append, jobs, **kwargs)
+    return output
+
+
+class TestEngine:
+    jobs = [
+        {"nuts": "CZ0642", "resource": "county", "city": None},
+        {"nuts": "CZ0642", "resource": "county", "city": "Brno"},
+    ]
+
+    def test_engines_return_same_data(self, county_api):
+        sync_output = run(county_api, run_sync, self.jobs)
+        async_output = run(county_api, run_async, self.jobs, queue_size=1)
+        assert_that(async_output, contains_inanyorder(*sync_output))
+        assert_that(list(sync_output[1].keys()), equal_to(["582786"]))
+
+    def test_async_engine_processes_more_jobs_than_queue_size(self, county_api):
+        output = run(
+            county_api, run_async, self.jobs * 10, queue_size=1, fetch_concurrency=3
+        )
+        assert_that(len(output), equal_to(20))
+
+    def test_engines_raise_on_api_error(self, county_api):
+        jobs = [{"nuts": "CZ01", "resource": "county", "city": None}]
+        for engine in [run_sync, run_async]:
+            assert_that(
+                calling(run).with_args(county_api, engine, jobs), raises(RuntimeError)
+            )
+
+    def test_engines_skip_failed_jobs_on_error(self, county_api):
+        jobs = [{"nuts": "CZ01", "resource": "county", "city": None}, *self.jobs]
+        for engine in [run_sync, run_async]:
+            errors: list = []
+            output = run(
+                county_api,
+                engine,
+                jobs,
+                on_error=lambda job, exc: errors.append(job["nuts"]),
+            )
+            assert_that(len(output), equal_to(2))
+            assert_that(errors, equal_to(["CZ01"]))
+
+    def test_large_payloads_are_streamed(self, county_api, county_xml):
+        def stream_parser(raw_data, **kwargs):
+            return {"streamed": len(raw_data)}
+
+        for engine in [run_sync, run_async]:
+            output = run(
+                county_api,
+                engine,
+                self.jobs,
+                stream_parser=stream_parser,
+                stream_threshold=10,
+            )
+            assert_that(output[0], equal_to({"streamed": len(county_xml)}))
+
+    def test_threshold_counts_encoded_bytes(self):
+        assert_that(exceeds_threshold("abc", 3), equal_to(False))
+        assert_that(exceeds_threshold("abcd", 3), equal_to(True))
+        assert_that(exceeds_threshold("žžž", 5), equal_to(True))
+        assert_that(exceeds_threshold("žž", 5), equal_to(False))
+        assert_that(exceeds_threshold("ž" * 100, 0), equal_to(False))
@@ -0,0 +1,59 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing city index.
+"""
+
+from hamcrest import assert_that, contains_exactly, equal_to, has_entries, has_length
+from src.index import (
+    index_county_data,
+    load_index,
+    normalize_name,
+    save_index,
+    search,
+    sort_index,
+)
+from src.parser import parse_xml
+
+
+class TestIndex:
+    def test_normalize_name(self):
+        assert_that(normalize_name(" Brno-Žabovřesky "), equal_to("brno-zabovresky"))
+        assert_that(normalize_name("ÚSTÍ  nad Labem"), equal_to("usti nad labem"))
+
+    def test_saved_index_is_searchable(self, tmp_path, county_xml):
+        _, county = parse_xml(county_xml)
+        location = str(tmp_path / "city_index.json")
+        entries = index_county_data(county, nuts="CZ0642")
+        entries.append(
+            {"key": "blansko", "name": "Blansko", "nuts": "CZ0641", "code": "581283"}
+        )
+        save_index(entries, location)
+        index = load_index(location)
+
+        assert_that(
+            search(index, "BRNO"),
+            contains_exactly(has_entries(nuts="CZ0642", code="582786")),
+        )
+        assert_that(
+            [entry["name"] for entry in search(index, "brno", prefix=True)],
+            equal_to(["Brno", "Brno-Žabovřesky"]),
+        )
+        assert_that(search(index, "brnoo", prefix=True), equal_to([]))
+
+    def test_search_picks_city_by_nuts(self):
+        index = sort_index(
+            [
+                {
+                    "key": normalize_name("Bělá"),
+                    "name": "Bělá",
+                    "nuts": nuts,
+                    "code": code,
+                }
+                for nuts, code in [("CZ0531", "1"), ("CZ0763", "2"), ("CZ0641", "3")]
+            ]
+        )
+        assert_that(search(index, "Bělá"), has_length(3))
+        assert_that(
+            search(index, "Bělá", nuts="CZ0763"),
+            contains_exactly(has_entries(code="2")),
+        )
+        assert_that(search(index, "bela", nuts="CZ05"), has_length(1))
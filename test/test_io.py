@@ -0,0 +1,130 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing IO functions.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from os import listdir
+
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_length,
+    less_than,
+    less_than_or_equal_to,
+)
+from src.io import memory_cache_size, process_cache, process_memory_cache, read_cache
+
+payload: str = "<VYSLEDKY>" + "<OBEC NAZEVZAST='Praha'/>" * 1000 + "</VYSLEDKY>"
+
+
+def cache_in_process(location: str, nuts_codes: list[str]) -> None:
+    for nuts in nuts_codes:
+        process_cache(
+            600,
+            location,
+            lambda nuts=None, resource=None: (True, f"{payload}{nuts}"),
+            r"{{nuts}}",
+            nuts=nuts,
+            resource="/okres?nuts={{nuts}}",
+        )
+
+
+class TestCache:
+    calls: list[str] = []
+
+    def fake_api(self, nuts: str = None, resource: str = None) -> tuple[bool, str]:
+        self.calls.append(nuts)
+        return (True, payload)
+
+    def cached(self, location: str, nuts: str, time_delta: int = 600):
+        return process_cache(
+            time_delta,
+            location,
+            self.fake_api,
+            r"{{nuts}}",
+            nuts=nuts,
+            resource="/okres?nuts={{nuts}}",
+        )
+
+    def test_cache_returns_cached_data(self, tmp_path):
+        location = str(tmp_path / "cache.tmp")
+        self.calls.clear()
+        assert_that(self.cached(location, "CZ0100"), equal_to((True, payload)))
+        assert_that(self.cached(location, "CZ0100"), equal_to((True, payload)))
+        assert_that(self.calls, equal_to(["CZ0100"]))
+
+    def test_identical_payloads_are_stored_once_compressed(self, tmp_path):
+        location = str(tmp_path / "cache.tmp")
+        self.cached(location, "CZ0100")
+        self.cached(location, "CZ0201")
+        blobs = listdir(f"{location}.blobs")
+        assert_that(blobs, has_length(1))
+        assert_that(
+            (tmp_path / "cache.tmp.blobs" / blobs[0]).stat().st_size,
+            less_than(len(payload)),
+        )
+
+        metadata = read_cache(location)
+        assert_that(metadata["/okres?nuts=CZ0100"]["status"], equal_to(True))
+        assert_that(
+            metadata["/okres?nuts=CZ0100"]["digest"],
+            equal_to(metadata["/okres?nuts=CZ0201"]["digest"]),
+        )
+
+    def test_expired_entry_is_refreshed(self, tmp_path):
+        location = str(tmp_path / "cache.tmp")
+        self.calls.clear()
+        self.cached(location, "CZ0100", time_delta=-1)
+        self.cached(location, "CZ0100", time_delta=-1)
+        assert_that(self.calls, has_length(2))
+        assert_that(listdir(f"{location}.blobs"), has_length(1))
+
+    def test_oldest_entries_are_evicted_from_disk(self, tmp_path):
+        location = str(tmp_path / "cache.tmp")
+        for nuts in ["CZ0100", "CZ0201", "CZ0202"]:
+            process_cache(
+                600,
+                location,
+                lambda nuts=None, resource=None: (True, nuts),
+                r"{{nuts}}",
+                max_entries=2,
+                nuts=nuts,
+                resource="/okres?nuts={{nuts}}",
+            )
+        assert_that(
+            list(read_cache(location).keys()),
+            equal_to(["/okres?nuts=CZ0201", "/okres?nuts=CZ0202"]),
+        )
+        assert_that(listdir(f"{location}.blobs"), has_length(2))
+
+
+class TestMemoryCache:
+    def test_processes_sharing_cache_keep_all_entries(self, tmp_path):
+        location = str(tmp_path / "cache.tmp")
+        batches = [
+            [f"CZ0{worker}{index:02}" for index in range(10)] for worker in range(4)
+        ]
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            list(executor.map(cache_in_process, [location] * 4, batches))
+
+        assert_that(read_cache(location), has_length(40))
+        assert_that(listdir(f"{location}.blobs"), has_length(40))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        def cached(nuts: str, max_bytes: int):
+            return process_memory_cache(
+                600,
+                lambda nuts=None, resource=None: (True, nuts * 100),
+                r"{{nuts}}",
+                max_bytes=max_bytes,
+                nuts=nuts,
+                resource="/memory?nuts={{nuts}}",
+            )
+
+        cached("CZ0100", 0)
+        entry_size = memory_cache_size()
+        cached("CZ0201", entry_size * 2)
+        cached("CZ0100", entry_size * 2)
+        cached("CZ0202", entry_size * 2)
+        assert_that(memory_cache_size(), less_than_or_equal_to(entry_size * 2))
+        assert_that(cached("CZ0100", entry_size * 2), equal_to((True, "CZ0100" * 100)))
@@ -4,9 +4,15 @@
 
 from typing import Any
 
+from hamcrest import assert_that, equal_to, has_entry, has_length
 from src.api import get_county_data
 from src.io import load_config
-from src.parser import parse_xml
+from src.parser import (
+    compile_projection,
+    parse_county_data,
+    parse_county_data_stream,
+    parse_xml,
+)
 
 config: dict[str, Any] = load_config()
 county: str = config["api"]["resources"]["vysledky_okresy_obce"]
@@ -18,3 +24,47 @@ class TestParser:
         assert api_status is True
         parse_status, _ = parse_xml(raw_data)
         assert parse_status is True
+
+    def test_stream_parser_returns_same_data(self, county_xml):
+        _, parsed = parse_xml(county_xml)
+        for city in [None, "Brno"]:
+            assert_that(
+                parse_county_data_stream(county_xml, city=city),
+                equal_to(parse_county_data(parsed, city=city)),
+            )
+
+    def test_county_parsers_filter_by_code(self, county_xml):
+        _, parsed = parse_xml(county_xml)
+        assert_that(
+            list(parse_county_data(parsed, code="551007")), equal_to(["551007"])
+        )
+        assert_that(
+            list(parse_county_data_stream(county_xml, code="551007")),
+            equal_to(["551007"]),
+        )
+
+    def test_projection_limits_parsed_values(self, county_xml):
+        _, parsed = parse_xml(county_xml)
+        projection = compile_projection(["NAZEVZAST", "HLASY"], ["VOLEBNI_STRANA"])
+        expected = {
+            "582786": {
+                "descriptors": {"NAZEVZAST": "Brno"},
+                "data": [{"HLASY": "1200"}, {"HLASY": "800"}],
+            }
+        }
+        assert_that(
+            parse_county_data(parsed, city="Brno", projection=projection),
+            equal_to(expected),
+        )
+        assert_that(
+            parse_county_data_stream(county_xml, city="Brno", projection=projection),
+            equal_to(expected),
+        )
+
+    def test_no_projection_keeps_all_values(self, county_xml):
+        _, parsed = parse_xml(county_xml)
+        assert_that(compile_projection(), equal_to(None))
+        assert_that(
+            parse_county_data(parsed, projection=compile_projection(fields=["HLASY"])),
+            has_entry("551007", has_entry("data", has_length(2))),
+        )
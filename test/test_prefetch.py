@@ -0,0 +1,55 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing cache prefetch.
+"""
+
+from hamcrest import (
+    assert_that,
+    calling,
+    contains_inanyorder,
+    equal_to,
+    has_item,
+    has_length,
+    raises,
+)
+from src.io import read_nuts
+from src.prefetch import county_nuts, neighbours, prefetch
+
+nuts: dict[str, str] = read_nuts()
+
+
+def fake_county_data(nuts: str = None, **kwargs) -> tuple[bool, str]:
+    if nuts == "CZ0100":
+        raise RuntimeError("Connection error")
+    return (True, "<VYSLEDKY/>")
+
+
+class TestPrefetch:
+    def test_county_nuts(self):
+        assert_that(county_nuts(nuts), has_length(77))
+        assert_that(county_nuts(nuts), has_item("CZ0100"))
+        assert_that(
+            county_nuts(nuts, ["CZ071", "CZ0100"]),
+            equal_to(["CZ0100", "CZ0711", "CZ0712", "CZ0713", "CZ0714", "CZ0715"]),
+        )
+
+    def test_neighbours(self):
+        assert_that(neighbours("CZ0413", nuts), contains_inanyorder("CZ0411", "CZ0412"))
+        assert_that(neighbours("CZ0100", nuts), equal_to([]))
+
+    def test_prefetch_reports_progress_and_failures(self):
+        messages: list[str] = []
+        jobs = [
+            (fake_county_data, {"nuts": code, "resource": "county"})
+            for code in ["CZ0100", "CZ0711", "CZ0712"]
+        ]
+        stats = prefetch(jobs, rate=1000, concurrency=2, report=messages.append)
+        assert_that(stats["done"], equal_to(3))
+        assert_that(stats["failed"], equal_to(1))
+        assert_that(messages, has_length(3))
+
+    def test_prefetch_rejects_non_positive_rate_and_concurrency(self):
+        assert_that(calling(prefetch).with_args([], rate=0), raises(ValueError, "rate"))
+        assert_that(
+            calling(prefetch).with_args([], concurrency=-1),
+            raises(ValueError, "concurrency"),
+        )
@@ -0,0 +1,113 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing recording and replay.
+"""
+
+import json
+from time import perf_counter
+
+from hamcrest import assert_that, equal_to, greater_than_or_equal_to, has_entries
+from src.parser import (
+    compile_projection,
+    parse_county_data,
+    parse_county_data_stream,
+    parse_state_data,
+    parse_xml,
+)
+from src.replay import percentile, read_recording, recorder, replay
+
+parsers: dict = {"county": parse_county_data, "state": parse_state_data}
+
+
+class TestReplay:
+    def test_percentile(self):
+        values = [float(value) for value in range(1, 101)]
+        assert_that(percentile(values, 50), equal_to(50.0))
+        assert_that(percentile(values, 99), equal_to(99.0))
+        assert_that(percentile([], 50), equal_to(0.0))
+
+    def test_recorded_payloads_are_replayed(self, tmp_path, county_xml, state_xml):
+        location = str(tmp_path / "recording.jsonl")
+        county_api = recorder(lambda **kwargs: (True, county_xml), "county", location)
+        state_api = recorder(lambda **kwargs: (True, state_xml), "state", location)
+        failing_api = recorder(lambda **kwargs: (False, "<CHYBA/>"), "county", location)
+        county_api(nuts="CZ0642", resource="county", city="Brno")
+        state_api(resource="state")
+        failing_api(nuts="CZ01", resource="county")
+
+        output: list = []
+        stats = replay(read_recording(location), parse_xml, parsers, output.append)
+        assert_that(list(output[0].keys()), equal_to(["582786"]))
+        assert_that(list(output[1].keys()), equal_to(["CR"]))
+        assert_that(stats, has_entries(records=2, rows=4))
+        assert_that(
+            stats["latency"]["parse_xml"]["p99"],
+            greater_than_or_equal_to(stats["latency"]["parse_xml"]["p50"]),
+        )
+        assert_that(
+            list(stats["latency"].keys()),
+            equal_to(["parse_xml", "parse_data", "output"]),
+        )
+
+    def test_unchanged_payloads_are_recorded_as_markers(self, tmp_path, state_xml):
+        location = str(tmp_path / "recording.jsonl")
+        changed_xml = state_xml.replace("CR", "CZ")
+        payloads = iter([state_xml, state_xml, changed_xml, changed_xml])
+        for _ in range(4):
+            # worker creates the recorder on each poll
+            recorder(lambda **kwargs: (True, next(payloads)), "state", location)(
+                resource="state"
+            )
+
+        with open(location, mode="r", encoding="utf-8") as recording:
+            assert_that(
+                ["data" in json.loads(line) for line in recording],
+                equal_to([True, False, True, False]),
+            )
+        assert_that(
+            [record["data"] for record in read_recording(location)],
+            equal_to([state_xml, state_xml, changed_xml, changed_xml]),
+        )
+
+    def test_projection_and_stream_parser_are_replayed(self, tmp_path, county_xml):
+        location = str(tmp_path / "recording.jsonl")
+        county_api = recorder(lambda **kwargs: (True, county_xml), "county", location)
+        county_api(
+            nuts="CZ0642",
+            resource="county",
+            code="582786",
+            projection=compile_projection(["NAZEVZAST", "KSTRANA"], ["VOLEBNI_STRANA"]),
+        )
+
+        outputs: list = []
+        for stream_threshold in (0, 1):
+            output: list = []
+            stats = replay(
+                read_recording(location),
+                parse_xml,
+                parsers,
+                output.append,
+                stream_parsers={"county": parse_county_data_stream},
+                stream_threshold=stream_threshold,
+            )
+            outputs.append(output)
+
+        assert_that(list(stats["latency"].keys()), equal_to(["parse_stream", "output"]))
+        assert_that(outputs[1], equal_to(outputs[0]))
+        assert_that(
+            outputs[0][0]["582786"],
+            equal_to(
+                {
+                    "descriptors": {"NAZEVZAST": "Brno"},
+                    "data": [{"KSTRANA": "1"}, {"KSTRANA": "2"}],
+                }
+            ),
+        )
+
+    def test_speed_compresses_recorded_time(self, state_xml):
+        records = [
+            {"time": 0.0, "kind": "state", "kwargs": {}, "data": state_xml},
+            {"time": 10.0, "kind": "state", "kwargs": {}, "data": state_xml},
+        ]
+        started = perf_counter()
+        replay(records, parse_xml, parsers, lambda _: None, speed=100)
+        assert_that(perf_counter() - started, greater_than_or_equal_to(0.1))
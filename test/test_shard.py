@@ -0,0 +1,110 @@
+# pylint: disable=missing-class-docstring, invalid-name, no-self-use, missing-function-docstring
+"""Testing sharded polling.
+"""
+
+from hamcrest import assert_that, contains_string, equal_to, has_length, is_
+from src.shard import (
+    acquire_lease,
+    build_ring,
+    connect,
+    owner,
+    read_result,
+    shard_poll,
+    shared_results,
+    store_result,
+)
+
+settings: dict = {
+    "worker_ttl": 60,
+    "lease_duration": 30,
+    "result_ttl": 600,
+    "replicas": 64,
+}
+resources: list[str] = [f"/okres?nuts=CZ0{index}" for index in range(100, 200)]
+
+
+class TestShard:
+    def test_ring_moves_only_keys_of_removed_worker(self):
+        before = build_ring(["a", "b", "c"])
+        after = build_ring(["a", "b"])
+        for resource in resources:
+            if owner(before, resource) != "c":
+                assert_that(owner(after, resource), equal_to(owner(before, resource)))
+        assert_that(
+            {owner(before, resource) for resource in resources},
+            equal_to({"a", "b", "c"}),
+        )
+
+    def test_lease_is_exclusive_until_expired(self, tmp_path):
+        connection = connect(str(tmp_path / "shard.sqlite"))
+        assert_that(acquire_lease(connection, "/stat", "a", 30, now=0), is_(True))
+        assert_that(acquire_lease(connection, "/stat", "b", 30, now=10), is_(False))
+        assert_that(acquire_lease(connection, "/stat", "a", 30, now=10), is_(True))
+        assert_that(acquire_lease(connection, "/stat", "b", 30, now=50), is_(True))
+
+    def test_workers_share_resources_and_rebalance(self, tmp_path):
+        connection = connect(str(tmp_path / "shard.sqlite"))
+        calls: list[str] = []
+        jobs = [
+            (
+                resource,
+                lambda resource=None: calls.append(resource) or (True, resource),
+                {"resource": resource},
+            )
+            for resource in resources
+        ]
+
+        shard_poll(connection, "a", jobs, settings, now=0, report=None)
+        shard_poll(connection, "b", jobs, settings, now=0, report=None)
+        stats_a = shard_poll(connection, "a", jobs, settings, now=1, report=None)
+        assert_that(stats_a["workers"], equal_to(2))
+
+        # worker b is dead after worker_ttl, worker a takes over its resources
+        stats_a = shard_poll(connection, "a", jobs, settings, now=700, report=None)
+        assert_that(stats_a["owned"], equal_to(len(resources)))
+        assert_that(len(calls), equal_to(2 * len(resources)))
+        assert_that(len(set(calls)), equal_to(len(resources)))
+        assert_that(
+            read_result(connection, resources[0]), equal_to((700, (True, resources[0])))
+        )
+
+    def test_failed_fetches_are_reported_and_retried(self, tmp_path):
+        connection = connect(str(tmp_path / "shard.sqlite"))
+
+        def failing_api(**kwargs):
+            raise ConnectionError("volby.cz is down")
+
+        jobs = [
+            ("/stat", failing_api, {}),
+            ("/okres", lambda **kwargs: (False, "Chyba"), {}),
+        ]
+        messages: list[str] = []
+        stats = shard_poll(
+            connection, "a", jobs, settings, now=0, report=messages.append
+        )
+
+        assert_that(stats["failed"], equal_to(2))
+        assert_that(messages[0], contains_string("/stat: volby.cz is down"))
+        assert_that(messages[1], contains_string("/okres: Chyba"))
+        assert_that(read_result(connection, "/stat"), is_(None))
+
+    def test_consumers_read_shared_results(self, tmp_path):
+        location = str(tmp_path / "shard.sqlite")
+        connection = connect(location)
+        store_result(connection, "/okres?nuts=CZ0642", (True, "<OBEC/>"))
+        calls: list[dict] = []
+
+        def api(**kwargs):
+            calls.append(kwargs)
+            return (True, "<fetched/>")
+
+        shared = shared_results(api, location, r"{{nuts}}", max_age=60)
+        resource = "/okres?nuts={{nuts}}"
+        assert_that(
+            shared(nuts="CZ0642", resource=resource), equal_to((True, "<OBEC/>"))
+        )
+        assert_that(calls, equal_to([]))
+        assert_that(
+            shared(nuts="CZ0643", resource=resource), equal_to((True, "<fetched/>"))
+        )
+        assert_that(calls, has_length(1))